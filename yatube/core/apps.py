@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+    verbose_name = 'Инфраструктура'
+
+    def ready(self):
+        from . import checks, db  # noqa: F401
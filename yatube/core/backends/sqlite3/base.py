@@ -0,0 +1,38 @@
+from functools import partial
+
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+from core.pool import PoolExhausted, get_pool, pools
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с пулом соединений на процесс: закрытие возвращает
+    соединение в пул, а следующее открытие берёт его оттуда без повторной
+    настройки (регистрация функций, PRAGMA). База в памяти не пулится."""
+
+    reused = False
+
+    def get_pool(self, conn_params):
+        create = partial(super().get_new_connection, conn_params)
+        return get_pool(self.alias, create, settings.CORE_DB_POOL_SIZE,
+                        settings.CORE_DB_POOL_TIMEOUT)
+
+    def get_new_connection(self, conn_params):
+        if self.is_in_memory_db():
+            return super().get_new_connection(conn_params)
+        try:
+            connection, self.reused = self.get_pool(conn_params).checkout()
+        except PoolExhausted as error:
+            raise base.Database.OperationalError(str(error)) from error
+        return connection
+
+    def _close(self):
+        if self.is_in_memory_db():
+            return super()._close()
+        pool = pools.get(self.alias)
+        if pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.checkin(self.connection, reusable=not (
+                self.errors_occurred or self.in_atomic_block))
@@ -0,0 +1,48 @@
+from urllib.parse import parse_qsl, urlparse
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'pylibmc': 'django.core.cache.backends.memcached.PyLibMCCache',
+    'redis': 'django_redis.cache.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# У каждого процесса своя копия: инвалидация в одном воркере
+# не доходит до остальных
+LOCAL_BACKENDS = {BACKENDS['locmem']}
+
+
+def is_shared(config):
+    """Общий ли кэш из записи ``CACHES`` для всех воркеров."""
+    return config['BACKEND'] not in LOCAL_BACKENDS
+
+
+def parse_cache_url(url):
+    """Собирает запись ``CACHES`` из URL вида ``file:///var/tmp/yatube``,
+    ``memcached://127.0.0.1:11211`` или ``redis://127.0.0.1:6379/1``.
+
+    Параметры запроса попадают в ``OPTIONS`` (``?max_entries=10000``),
+    кроме ``timeout`` и ``key_prefix``."""
+    parsed = urlparse(url)
+    if parsed.scheme not in BACKENDS:
+        raise ValueError(f'Неизвестный кэш-бэкенд: {parsed.scheme!r}')
+    config = {'BACKEND': BACKENDS[parsed.scheme]}
+    if parsed.scheme == 'file':
+        config['LOCATION'] = parsed.path
+    elif parsed.scheme == 'redis':
+        config['LOCATION'] = url.split('?', 1)[0]
+    elif parsed.netloc:
+        config['LOCATION'] = parsed.netloc
+    options = {}
+    for name, value in parse_qsl(parsed.query):
+        if name == 'timeout':
+            config['TIMEOUT'] = int(value)
+        elif name == 'key_prefix':
+            config['KEY_PREFIX'] = value
+        else:
+            options[name.upper()] = int(value) if value.isdigit() else value
+    if options:
+        config['OPTIONS'] = options
+    return config
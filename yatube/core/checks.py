@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if settings.CORE_CACHE_SHARED:
+        return []
+    return [Warning(
+        'Кэш не общий для воркеров (CACHE_URL=locmem://): граф подписок '
+        'читается из базы при каждом запросе, страницы лент не кэшируются '
+        'и не отдают ETag.',
+        hint='Задайте общий CACHE_URL (file://, memcached://, redis://) '
+             'или CORE_CACHE_SHARED=1, если процесс один.',
+        id='core.W001',
+    )]
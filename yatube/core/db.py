@@ -0,0 +1,32 @@
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMA_NAME_RE = re.compile(r'\A[a-z_]+\Z')
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет ``PRAGMA name = value`` для каждой пары ``pragmas``."""
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if not PRAGMA_NAME_RE.match(name):
+                raise ValueError(f'неверное имя PRAGMA {name!r}')
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def pragma_values(connection, names):
+    with connection.cursor() as cursor:
+        return {name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in names}
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    # Каждое новое соединение: большая часть PRAGMA живёт только
+    # в нём, journal_mode=WAL сохраняется в самом файле базы. Соединение
+    # из пула (core.backends.sqlite3) уже настроено
+    if connection.vendor == 'sqlite' and not getattr(
+            connection, 'reused', False):
+        apply_pragmas(connection, settings.CORE_SQLITE_PRAGMAS)
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.core.cache import caches
+from django.db import connections
+
+from .pool import pools
+
+
+def backend_stats(backend):
+    """Статистика, которую умеет отдавать конкретный бэкенд."""
+    if hasattr(backend, '_cache') and hasattr(backend._cache, 'get_stats'):
+        return {server: dict(stats)
+                for server, stats in backend._cache.get_stats()}
+    if hasattr(backend, '_list_cache_files'):
+        files = backend._list_cache_files()
+        return {'entries': len(files),
+                'bytes': sum(os.path.getsize(name) for name in files
+                             if os.path.exists(name))}
+    if isinstance(getattr(backend, '_cache', None), dict):
+        return {'entries': len(backend._cache)}
+    return {}
+
+
+def health(alias='default'):
+    """Проверяет кэш записью и чтением служебного ключа."""
+    backend = caches[alias]
+    key = 'core:health'
+    token = str(time.time_ns())
+    started = time.perf_counter()
+    try:
+        backend.set(key, token, 10)
+        healthy = backend.get(key) == token
+        error = None
+    except Exception as exc:  # кэш недоступен — это и есть ответ
+        healthy, error = False, str(exc)
+    return {
+        'backend': f'{type(backend).__module__}.{type(backend).__name__}',
+        'healthy': healthy,
+        'error': error,
+        'roundtrip_ms': round((time.perf_counter() - started) * 1000, 3),
+        'stats': backend_stats(backend) if healthy else {},
+    }
+
+
+def database_status():
+    """Настройки соединений и статистика пулов по алиасам баз."""
+    status = {}
+    for alias in connections:
+        settings_dict = connections.databases[alias]
+        pool = pools.get(alias)
+        status[alias] = {
+            'engine': settings_dict['ENGINE'],
+            'conn_max_age': settings_dict['CONN_MAX_AGE'],
+            'pool': pool.stats() if pool else None,
+        }
+    return status
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны и сообщает об ошибках; при запуске '
+            'воркера то же делает yatube/wsgi.py.')
+
+    def handle(self, *args, **options):
+        compiled, errors = warm_templates()
+        if options['verbosity'] > 1:
+            for name, elapsed in sorted(compiled.items(),
+                                        key=lambda item: -item[1]):
+                self.stdout.write(f'{elapsed:8.2f} мс  {name}')
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Не компилируются шаблоны: {len(errors)}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {len(compiled)} за '
+            f'{sum(compiled.values()):.1f} мс.'
+        ))
@@ -0,0 +1,123 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Границы корзин гистограмм: миллисекунды и число запросов к БД
+TIME_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+METRICS = {
+    'total': TIME_BUCKETS,
+    'view': TIME_BUCKETS,
+    'db': TIME_BUCKETS,
+    'template': TIME_BUCKETS,
+    'queries': QUERY_BUCKETS,
+}
+QUANTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: память не растёт
+    с числом запросов, квантили оцениваются верхней границей корзины."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                break
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.sum / self.count, 3) if self.count else 0,
+            'max': round(self.max, 3),
+            **{f'p{round(q * 100)}': self.quantile(q) for q in QUANTILES},
+            'buckets': dict(zip(
+                [f'<={bound}' for bound in self.bounds] + ['inf'],
+                self.counts,
+            )),
+        }
+
+
+class Registry:
+    """Гистограммы метрик по имени URL в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, url_name, values):
+        with self._lock:
+            histograms = self._views.get(url_name)
+            if histograms is None:
+                histograms = self._views[url_name] = {
+                    metric: Histogram(bounds)
+                    for metric, bounds in METRICS.items()
+                }
+            for metric, value in values.items():
+                histograms[metric].add(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                url_name: {metric: histogram.as_dict()
+                           for metric, histogram in histograms.items()}
+                for url_name, histograms in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    """Счётчики одного запроса; пока он обрабатывается, доступны через
+    ``current()`` из обёртки SQL и шаблонного бэкенда."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_depth = 0
+
+    def __enter__(self):
+        _local.timings = self
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.timings = None
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+
+def current():
+    return getattr(_local, 'timings', None)
@@ -0,0 +1,88 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import routers
+from .metrics import RequestTimings, registry
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+PIN_COOKIE = 'pin_primary'
+
+
+def server_timing(values):
+    return ', '.join([
+        f'db;dur={values["db"]:.1f};desc="{values["queries"]} queries"',
+        f'tpl;dur={values["template"]:.1f}',
+        f'view;dur={values["view"]:.1f}',
+        f'total;dur={values["total"]:.1f}',
+    ])
+
+
+def shows_server_timing(request):
+    if settings.CORE_SERVER_TIMING:
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+class RequestMetricsMiddleware:
+    """Считает запросы к БД, время SQL, рендеринга шаблонов и вью,
+    отдаёт их персоналу (или всем с ``CORE_SERVER_TIMING``) в заголовке
+    ``Server-Timing`` и копит гистограммы по имени URL
+    (см. ``/stats/requests/``)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with RequestTimings() as timings, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timings.execute_wrapper))
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        view_started = getattr(request, '_view_started', finished)
+        values = {
+            'total': (finished - started) * 1000,
+            'view': (finished - view_started) * 1000,
+            'db': timings.db * 1000,
+            'template': timings.template * 1000,
+            'queries': timings.queries,
+        }
+        match = request.resolver_match
+        registry.record(match.view_name if match else '<unresolved>', values)
+        if shows_server_timing(request):
+            response['Server-Timing'] = server_timing(values)
+        return response
+
+
+class PrimaryPinningMiddleware:
+    """Включает чтение с реплик для безопасных запросов. После записи
+    браузер на ``CORE_DB_PIN_SECONDS`` получает cookie, и его запросы
+    читают с основной базы — например, страница после редиректа
+    из ``new_post`` не отстанет от реплики."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.CORE_DB_REPLICAS:
+            return self.get_response(request)
+        # Запись через сырой SQL роутер не видит, поэтому небезопасный
+        # метод считается записью сам по себе
+        unsafe = request.method not in SAFE_METHODS
+        with routers.replica_reads(
+                pinned=unsafe or PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+        if unsafe or state.wrote:
+            response.set_cookie(PIN_COOKIE, '1',
+                                max_age=settings.CORE_DB_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
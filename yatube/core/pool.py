@@ -0,0 +1,129 @@
+import threading
+import time
+
+from .metrics import TIME_BUCKETS, Histogram
+
+# Пулы процесса по алиасу базы (см. core.backends.sqlite3)
+pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Пул соединений не больше ``max_size``: при выдаче соединение
+    проверяется запросом ``SELECT 1``, сломанные закрываются и заменяются
+    новыми. Если все соединения заняты, ``checkout`` ждёт до ``timeout``
+    секунд."""
+
+    def __init__(self, create, max_size, timeout):
+        self.create = create
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle = []
+        self.in_use = 0
+        self.created = 0
+        self.discarded = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait = Histogram(TIME_BUCKETS)
+        self.connect = Histogram(TIME_BUCKETS)
+        self.condition = threading.Condition()
+
+    def checkout(self):
+        """Возвращает пару (соединение, взято ли оно из пула)."""
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        with self.condition:
+            while not self.idle and self.in_use >= self.max_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolExhausted(
+                        f'все {self.max_size} соединений заняты')
+                self.condition.wait(remaining)
+            connection = self.idle.pop() if self.idle else None
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait.add((time.perf_counter() - started) * 1000)
+        if connection is not None:
+            if self.healthy(connection):
+                return connection, True
+            self.close(connection)
+        try:
+            return self.open(), False
+        except Exception:
+            self.release()
+            raise
+
+    def checkin(self, connection, reusable=True):
+        if reusable and connection.in_transaction:
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+        if not reusable:
+            self.close(connection)
+        with self.condition:
+            if reusable:
+                self.idle.append(connection)
+            self.in_use -= 1
+            self.condition.notify()
+
+    def release(self):
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify()
+
+    def open(self):
+        started = time.perf_counter()
+        connection = self.create()
+        with self.condition:
+            self.created += 1
+            self.connect.add((time.perf_counter() - started) * 1000)
+        return connection
+
+    def close(self, connection):
+        with self.condition:
+            self.discarded += 1
+        try:
+            connection.close()
+        except Exception:  # соединение и так сломано
+            pass
+
+    @staticmethod
+    def healthy(connection):
+        try:
+            connection.execute('SELECT 1').fetchone()
+        except Exception:
+            return False
+        return True
+
+    def close_idle(self):
+        with self.condition:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'created': self.created,
+                'discarded': self.discarded,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_ms': self.wait.as_dict(),
+                'connect_ms': self.connect.as_dict(),
+            }
+
+
+def get_pool(alias, create, max_size, timeout):
+    with _pools_lock:
+        if alias not in pools:
+            pools[alias] = ConnectionPool(create, max_size, timeout)
+        return pools[alias]
@@ -0,0 +1,56 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """Разрешает чтение с реплик на время запроса. ``pinned`` — читать
+    с основной базы; любая запись внутри блока тоже закрепляет запрос
+    за основной базой, чтобы он видел свои изменения."""
+    _state.active = True
+    _state.pinned = pinned
+    _state.wrote = False
+    _state.replica_read = False
+    try:
+        yield _state
+    finally:
+        _state.active = _state.replica_read = False
+
+
+def replica_was_read():
+    """Читал ли текущий запрос хоть что-то с реплики."""
+    return getattr(_state, 'replica_read', False)
+
+
+class ReplicaRouter:
+    """Чтения в запросах уходят на случайную реплику из
+    ``CORE_DB_REPLICAS``, записи и всё вне запросов (команды, фоновые
+    потоки) — на основную базу."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.CORE_DB_REPLICAS
+        if (not replicas or not getattr(_state, 'active', False)
+                or _state.pinned):
+            return DEFAULT_DB_ALIAS
+        _state.replica_read = True
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if getattr(_state, 'active', False):
+            _state.pinned = _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.CORE_DB_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import _create_cache, cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import is_shared, parse_cache_url
+from ..checks import check_shared_cache
+
+User = get_user_model()
+
+CACHE_DIR = tempfile.mkdtemp()
+FILE_CACHE = parse_cache_url(f'file://{CACHE_DIR}')
+
+
+class ParseCacheUrlTest(TestCase):
+    def test_parse_cache_url(self):
+        """CACHE_URL превращается в запись CACHES."""
+        cases = {
+            'locmem://': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'file:///var/tmp/yatube?max_entries=5000&timeout=60': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': '/var/tmp/yatube',
+                'TIMEOUT': 60,
+                'OPTIONS': {'MAX_ENTRIES': 5000},
+            },
+            'memcached://127.0.0.1:11211?key_prefix=yatube': {
+                'BACKEND':
+                    'django.core.cache.backends.memcached.MemcachedCache',
+                'LOCATION': '127.0.0.1:11211',
+                'KEY_PREFIX': 'yatube',
+            },
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(parse_cache_url(url), expected)
+        with self.assertRaises(ValueError):
+            parse_cache_url('nosuch://')
+
+    def test_local_cache_is_not_shared(self):
+        """locmem у каждого воркера свой, и без общего кэша проверки
+        Django предупреждают об этом при старте."""
+        self.assertFalse(is_shared(parse_cache_url('locmem://')))
+        self.assertTrue(is_shared(FILE_CACHE))
+        with self.settings(CORE_CACHE_SHARED=False):
+            self.assertEqual(
+                [warning.id for warning in check_shared_cache(None)],
+                ['core.W001'])
+        with self.settings(CORE_CACHE_SHARED=True):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+@override_settings(CACHES={'default': FILE_CACHE}, CORE_CACHE_SHARED=True)
+class SharedCacheTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username='cache_admin',
+                                              is_staff=True)
+
+    def test_pages_are_shared_between_workers(self):
+        """Страница, закэшированная одним воркером, видна другому."""
+        Client().get(reverse('index'))
+        other_worker = _create_cache(FILE_CACHE['BACKEND'],
+                                     LOCATION=CACHE_DIR)
+        self.assertTrue(other_worker._list_cache_files())
+        self.assertEqual(other_worker.get('feed_version:index'),
+                         cache.get('feed_version:index'))
+
+    def test_cache_status_view(self):
+        """Статус кэша доступен только персоналу."""
+        url = reverse('core:cache_status')
+        self.assertEqual(Client().get(url).status_code, 302)
+        client = Client()
+        client.force_login(self.staff)
+        status = client.get(url).json()
+        self.assertTrue(status['healthy'])
+        self.assertTrue(status['backend'].endswith('FileBasedCache'))
+        self.assertIn('entries', status['stats'])
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+
+from ..db import apply_pragmas, pragma_values
+
+PRAGMAS = {'journal_mode': 'wal', 'synchronous': 'normal',
+           'busy_timeout': 1234, 'cache_size': -4096,
+           'mmap_size': 2 ** 20}
+
+
+class SqlitePragmasTest(TestCase):
+    def open_connection(self, path):
+        default = connections['default']
+        settings_dict = {**default.settings_dict, 'NAME': path}
+        wrapper = type(default)(settings_dict, alias='pragmas_test')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    @override_settings(CORE_SQLITE_PRAGMAS=PRAGMAS)
+    def test_new_connection_is_tuned(self):
+        """Новое соединение с файлом базы получает PRAGMA из настроек."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = self.open_connection(
+            os.path.join(directory.name, 'tuned.sqlite3'))
+        self.assertEqual(pragma_values(wrapper, PRAGMAS), {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': 1234,
+            'cache_size': -4096,
+            'mmap_size': 2 ** 20,
+        })
+
+    def test_bad_pragma_name(self):
+        """Имя PRAGMA не подставляется в SQL без проверки."""
+        with self.assertRaises(ValueError):
+            apply_pragmas(connection, {'cache_size = 1; DROP TABLE x': 1})
+
+    def test_benchmark_needs_file_database(self):
+        """Бенчмарк конкурентного доступа не запускается на базе в памяти."""
+        with self.assertRaises(CommandError):
+            call_command('bench_concurrency', seconds=0.1)
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..metrics import TIME_BUCKETS, Histogram, registry
+
+User = get_user_model()
+
+
+class HistogramTest(TestCase):
+    def test_quantiles_from_buckets(self):
+        """Квантили оцениваются верхней границей корзины,
+        переполнение — максимумом."""
+        histogram = Histogram(TIME_BUCKETS)
+        for value in [3] * 90 + [40] * 9 + [9000]:
+            histogram.add(value)
+        self.assertEqual(histogram.quantile(0.5), 5)
+        self.assertEqual(histogram.quantile(0.95), 50)
+        self.assertEqual(histogram.quantile(1), 9000)
+        self.assertEqual(histogram.as_dict()['count'], 100)
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        author = User.objects.create_user(username='measured')
+        Post.objects.create(text='Пост', author=author)
+
+    def test_server_timing_header(self):
+        """Персонал получает Server-Timing с SQL, шаблонами и вью."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='timed',
+                                                    is_staff=True))
+        timing = client.get(reverse('index'))['Server-Timing']
+        for metric in ('db;dur=', 'queries"', 'tpl;dur=', 'view;dur=',
+                       'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_server_timing_hidden_by_default(self):
+        """Остальным заголовок отдаётся только с CORE_SERVER_TIMING."""
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='untimed'))
+        for client in (Client(), reader):
+            self.assertFalse(
+                client.get(reverse('index')).has_header('Server-Timing'))
+        with self.settings(CORE_SERVER_TIMING=True):
+            self.assertTrue(
+                Client().get(reverse('index')).has_header('Server-Timing'))
+
+    def test_histograms_by_url_name(self):
+        """Метрики копятся по имени URL и видны только персоналу."""
+        client = Client()
+        client.get(reverse('index'))
+        client.get(reverse('index'))
+        index = registry.snapshot()['index']
+        self.assertEqual(index['total']['count'], 2)
+        self.assertGreater(index['queries']['max'], 0)
+        self.assertGreater(index['template']['max'], 0)
+
+        stats_url = reverse('core:request_stats')
+        self.assertEqual(client.get(stats_url).status_code, 302)
+        client.force_login(User.objects.create_user(username='ops',
+                                                    is_staff=True))
+        response = client.get(stats_url, {'format': 'json'})
+        self.assertEqual(response.json()['index']['total']['count'], 2)
+        self.assertContains(client.get(stats_url), '<td>index</td>')
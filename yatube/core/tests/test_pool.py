@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..backends.sqlite3.base import DatabaseWrapper
+from ..pool import ConnectionPool, PoolExhausted, pools
+
+User = get_user_model()
+
+
+class ConnectionPoolTest(TestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(lambda: sqlite3.connect(':memory:'),
+                                   max_size=2, timeout=0.05)
+        self.addCleanup(self.pool.close_idle)
+
+    def test_connections_are_reused(self):
+        """Возвращённое соединение выдаётся снова без открытия нового."""
+        first, reused = self.pool.checkout()
+        self.assertFalse(reused)
+        self.pool.checkin(first)
+        second, reused = self.pool.checkout()
+        self.assertIs(second, first)
+        self.assertTrue(reused)
+        stats = self.pool.stats()
+        self.assertEqual((stats['created'], stats['checkouts'],
+                          stats['in_use']), (1, 2, 1))
+
+    def test_max_size(self):
+        """Сверх max_size соединение не выдаётся, ожидание ограничено."""
+        self.pool.checkout()
+        self.pool.checkout()
+        with self.assertRaises(PoolExhausted):
+            self.pool.checkout()
+        self.assertEqual(self.pool.stats()['timeouts'], 1)
+
+    def test_broken_connection_is_replaced(self):
+        """Сломанное соединение не проходит проверку и заменяется."""
+        broken, _ = self.pool.checkout()
+        self.pool.checkin(broken)
+        broken.close()
+        connection, reused = self.pool.checkout()
+        self.assertIsNot(connection, broken)
+        self.assertFalse(reused)
+        self.assertEqual(self.pool.stats()['discarded'], 1)
+
+    def test_open_transaction_is_rolled_back(self):
+        """Незавершённая транзакция откатывается при возврате в пул."""
+        connection, _ = self.pool.checkout()
+        connection.execute('CREATE TABLE t (x)')
+        connection.execute('INSERT INTO t VALUES (1)')
+        self.assertTrue(connection.in_transaction)
+        self.pool.checkin(connection)
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(
+            connection.execute('SELECT COUNT(*) FROM t').fetchone()[0], 0)
+
+
+@override_settings(CORE_DB_POOL_SIZE=1, CORE_DB_POOL_TIMEOUT=0.05)
+class PooledBackendTest(TestCase):
+    alias = 'pool_test'
+
+    def open_wrapper(self, path):
+        settings_dict = {**connections['default'].settings_dict,
+                         'NAME': path}
+        wrapper = DatabaseWrapper(settings_dict, alias=self.alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_close_returns_connection_to_pool(self):
+        """Закрытие соединения Django возвращает его в пул, следующее
+        открытие берёт его оттуда, второму потребителю места нет."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(pools.pop, self.alias)
+        path = os.path.join(directory.name, 'pooled.sqlite3')
+
+        first = self.open_wrapper(path)
+        first.ensure_connection()
+        raw = first.connection
+        self.assertFalse(first.reused)
+        first.close()
+        first.ensure_connection()
+        self.assertIs(first.connection, raw)
+        self.assertTrue(first.reused)
+
+        with self.assertRaises(OperationalError):
+            self.open_wrapper(path).ensure_connection()
+        first.close()
+        self.assertEqual(pools[self.alias].stats()['idle'], 1)
+        pools[self.alias].close_idle()
+
+    def test_stats_page(self):
+        """Состояние соединений видно персоналу."""
+        admin = User.objects.create_user(username='pool_admin',
+                                         is_staff=True)
+        client = Client()
+        client.force_login(admin)
+        response = client.get(reverse('core:database_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('default', response.json())
+        response = client.get(reverse('core:request_stats'))
+        self.assertContains(response, 'CONN_MAX_AGE')
@@ -0,0 +1,101 @@
+import random
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from ..middleware import PIN_COOKIE, PrimaryPinningMiddleware
+
+User = get_user_model()
+
+
+@override_settings(CORE_DB_REPLICAS=['replica'], CORE_DB_PIN_SECONDS=7)
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def view(self, write=False):
+        def view(request):
+            self.reads.append(router.db_for_read(Post))
+            if write:
+                router.db_for_write(Post)
+                self.reads.append(router.db_for_read(Post))
+            return HttpResponse()
+        return PrimaryPinningMiddleware(view)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Вне запросов (команды, фоновые потоки) чтения идут
+        на основную базу."""
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+    def test_safe_request_reads_replica(self):
+        """GET без недавней записи читает с реплики и не ставит cookie."""
+        response = self.view()(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_request_and_browser(self):
+        """После записи чтения того же запроса и следующих запросов
+        в пределах окна идут на основную базу."""
+        response = self.view(write=True)(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica', 'default'])
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 7)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.view()(request)
+        self.assertEqual(self.reads[-1], 'default')
+
+    def test_post_reads_primary(self):
+        """Небезопасный запрос читает с основной базы и ставит cookie."""
+        response = self.view()(self.factory.post('/'))
+        self.assertEqual(self.reads, ['default'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(CORE_DB_REPLICAS=['default'], CORE_CACHE_SHARED=True)
+    def test_versioned_pages_read_replica(self):
+        """Страницы лент читают с реплики, но сразу после смены версии
+        ленты не кэшируются и не отдают ETag: реплика могла не догнать
+        изменение. Реплику здесь играет сама основная база."""
+        author = User.objects.create_user(username='replica_author')
+        group = Group.objects.create(title='Реплика', slug='replica')
+        post = Post.objects.create(text='Текст', author=author, group=group)
+        urls = (
+            reverse('index'),
+            reverse('posts', args=[group.slug]),
+            reverse('profile', args=[author.username]),
+            reverse('post', args=[author.username, post.id]),
+        )
+        cache.clear()
+        with mock.patch('core.routers.random.choice',
+                        wraps=random.choice) as choice:
+            for url in urls:
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertFalse(response.has_header('ETag'))
+        self.assertTrue(choice.called)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('index'))
+
+        with self.settings(CORE_DB_PIN_SECONDS=0):
+            for url in urls:
+                with self.subTest(url=url):
+                    self.assertTrue(self.client.get(url).has_header('ETag'))
+            with self.assertNumQueries(0):
+                self.client.get(reverse('index'))
+
+    @override_settings(CORE_DB_REPLICAS=[])
+    def test_without_replicas(self):
+        """Без реплик всё идёт на основную базу, cookie не ставится."""
+        response = self.view(write=True)(self.factory.post('/'))
+        self.assertEqual(self.reads, ['default', 'default'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,45 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import TestCase, override_settings
+
+from ..warmup import django_engines, template_names, warm_templates
+
+
+class WarmTemplatesTest(TestCase):
+    def test_every_template_compiles(self):
+        """Каждый шаблон проекта компилируется без ошибок."""
+        compiled, errors = warm_templates()
+        self.assertEqual(errors, {})
+        for name in template_names(settings.TEMPLATES_DIR):
+            with self.subTest(name=name):
+                self.assertIn(name, compiled)
+        self.assertIn('signup.html', compiled)
+
+    def test_cached_loader(self):
+        """Без DEBUG шаблоны загружаются кэширующим загрузчиком,
+        и прогретый шаблон берётся из кэша."""
+        engine, = django_engines()
+        loader, = engine.engine.template_loaders
+        self.assertIsInstance(loader, CachedLoader)
+        warm_templates()
+        self.assertIn('index.html', loader.get_template_cache)
+
+    def test_broken_template_fails_command(self):
+        """Команда перечисляет шаблоны с ошибками и завершается ошибкой."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(os.path.join(directory.name, 'broken.html'), 'w') as file:
+            file.write('{% if %}')
+        templates = [{**settings.TEMPLATES[0],
+                      'DIRS': [directory.name]}]
+        stderr = StringIO()
+        with override_settings(TEMPLATES=templates):
+            with self.assertRaises(CommandError):
+                call_command('warm_templates', stderr=stderr,
+                             stdout=StringIO())
+        self.assertIn('broken.html', stderr.getvalue())
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('cache/', views.cache_status, name='cache_status'),
+    path('requests/', views.request_stats, name='request_stats'),
+    path('db/', views.database_stats, name='database_stats'),
+]
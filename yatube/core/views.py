@@ -0,0 +1,27 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .health import database_status, health
+from .metrics import registry
+
+
+@staff_member_required
+def cache_status(request):
+    status = health()
+    return JsonResponse(status, status=200 if status['healthy'] else 503,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@staff_member_required
+def request_stats(request):
+    views = registry.snapshot()
+    if request.GET.get('format') == 'json':
+        return JsonResponse(views)
+    return render(request, 'core/request_stats.html',
+                  {'views': views, 'databases': database_status()})
+
+
+@staff_member_required
+def database_stats(request):
+    return JsonResponse(database_status())
@@ -0,0 +1,43 @@
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def django_engines():
+    return [engine for engine in engines.all()
+            if isinstance(engine, DjangoTemplates)]
+
+
+def warm_templates():
+    """Компилирует все шаблоны из каталогов проекта и приложений:
+    с кэширующим загрузчиком первый запрос воркера не тратит время на
+    разбор. Возвращает словари {имя: мс} и {имя: ошибка}."""
+    compiled, errors = {}, {}
+    for engine in django_engines():
+        directories = [*engine.engine.dirs,
+                       *get_app_template_dirs('templates')]
+        for directory in directories:
+            for name in template_names(directory):
+                if name in compiled or name in errors:
+                    continue
+                started = time.perf_counter()
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError as error:
+                    errors[name] = str(error)
+                    continue
+                compiled[name] = (time.perf_counter() - started) * 1000
+    return compiled, errors
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+
+from .feeds import (TIMELINE_ORDERING, follow_feed, group_feed, index_feed,
+                    profile_feed, timeline_posts)
+from .models import Group
+from .pagination import FEED_ORDERING, CursorPaginator, InvalidCursor
+
+User = get_user_model()
+
+# Поле ответа -> путь для .values(); автор и сообщество приходят JOIN-ом
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comment_count': 'comment_count',
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def selected_fields(request):
+    value = request.GET.get('fields')
+    if not value:
+        return list(FIELDS)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown:
+        raise BadRequest(f'неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def page_size(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.POSTS_PER_PAGE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest(f'неверный limit {value!r}')
+    if not 1 <= limit <= settings.POSTS_API_MAX_LIMIT:
+        raise BadRequest(
+            f'limit должен быть от 1 до {settings.POSTS_API_MAX_LIMIT}')
+    return limit
+
+
+def serialize(rows, names):
+    """Словари .values() -> записи ответа в порядке ``names``."""
+    paths = [FIELDS[name] for name in names]
+    results = []
+    for row in rows:
+        record = {name: row[path] for name, path in zip(names, paths)}
+        if record.get('image'):
+            record['image'] = default_storage.url(record['image'])
+        elif 'image' in record:
+            record['image'] = None
+        results.append(record)
+    return results
+
+
+def feed_response(request, queryset, timeline=None):
+    """Страница ленты в JSON: курсор ``?cursor=``, размер ``?limit=``,
+    поля ``?fields=id,text``. Модели не создаются — только .values().
+    Если передан ``timeline`` (записи ленты подписок), страница выбирается
+    по нему, а ``queryset`` только догружает посты."""
+    try:
+        names = selected_fields(request)
+        limit = page_size(request)
+    except BadRequest as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    # Поля ключа сортировки нужны курсору, даже если их не просили
+    paths = {FIELDS[name] for name in names}
+    paths.update(name.lstrip('-') for name in FEED_ORDERING)
+    rows = queryset.values(*paths)
+    if timeline is None:
+        paginator = CursorPaginator(rows, limit)
+    else:
+        paginator = CursorPaginator(timeline, limit, TIMELINE_ORDERING)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'неверный cursor'}, status=400)
+    if timeline is not None:
+        page.object_list = timeline_posts(page, rows)
+    return JsonResponse({
+        'results': serialize(page, names),
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+def posts(request):
+    return feed_response(request, index_feed())
+
+
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group_feed(group))
+
+
+def user_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(request, profile_feed(author))
+
+
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'нужно войти'}, status=401)
+    return feed_response(request, index_feed(),
+                         timeline=follow_feed(request.user))
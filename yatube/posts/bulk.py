@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Max
+
+from . import search, timeline
+from .caching import INDEX_FEED, bump_feeds, group_feed_name
+from .counters import rebuild_counters
+from .models import Comment, Group, Post
+
+# Поля, которые bulk_create иначе перезаписал бы текущим временем
+DATED_FIELDS = ((Post, 'pub_date'), (Comment, 'created'))
+
+
+def next_id(model):
+    """Первый свободный pk: SQLite не возвращает id из bulk_create,
+    поэтому при массовой вставке они назначаются заранее."""
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def batches(objects, size):
+    objects = iter(objects)
+    batch = list(islice(objects, size))
+    while batch:
+        yield batch
+        batch = list(islice(objects, size))
+
+
+def insert_batches(model, objects, batch_size, ignore_conflicts=False):
+    """Вставляет объекты пачками, каждую в своей транзакции;
+    возвращает число переданных объектов."""
+    total = 0
+    for batch in batches(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+        total += len(batch)
+    return total
+
+
+@contextmanager
+def explicit_dates():
+    """Отключает auto_now_add у дат постов и комментариев, чтобы
+    bulk_create сохранил переданные значения."""
+    fields = [model._meta.get_field(name) for model, name in DATED_FIELDS]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def rebuild_derived():
+    """Досчитывает то, что при обычной записи делают сигналы:
+    счётчики, ленты подписок, поисковый индекс и версии лент в кэше."""
+    rebuild_counters()
+    timeline.rebuild()
+    if search.is_available():
+        search.rebuild()
+    slugs = Group.objects.values_list('slug', flat=True)
+    bump_feeds(INDEX_FEED, *map(group_feed_name, slugs.iterator()))
@@ -0,0 +1,178 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+from core import routers
+
+from .models import Group
+
+User = get_user_model()
+
+INDEX_FEED = 'index'
+
+
+def group_feed_name(slug):
+    return f'group:{slug}'
+
+
+def author_feed_name(username):
+    # Профиль и страницы постов автора: посты, комментарии, подписки.
+    # Ключ по имени, чтобы валидаторы страниц обходились без запросов;
+    # имя хэшируется — в нём бывают пробелы и не-ASCII символы
+    return f'author:{hashlib.md5(username.encode()).hexdigest()}'
+
+
+def _version_key(feed):
+    return f'feed_version:{feed}'
+
+
+# Версия ленты — время её смены в наносекундах: она уникальна, так что
+# после вытеснения ключа из кэша не воскреснут старые страницы, и по ней
+# видно, успели ли реплики догнать изменение (см. ``settled``)
+
+def feed_version(feed):
+    key = _version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), settings.POSTS_FEED_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_feeds(*feeds):
+    """Инвалидирует закэшированные страницы перечисленных лент."""
+    cache.set_many(
+        {_version_key(feed): time.time_ns() for feed in feeds},
+        settings.POSTS_FEED_VERSION_TIMEOUT,
+    )
+
+
+def settled(*versions):
+    """Можно ли сохранить страницу под этими версиями лент. Страница,
+    прочитанная с реплики в первые ``CORE_DB_PIN_SECONDS`` после смены
+    версии, могла не увидеть изменение — под новой версией она бы так
+    и осталась старой."""
+    if not routers.replica_was_read():
+        return True
+    lag = settings.CORE_DB_PIN_SECONDS * 10 ** 9
+    return all(version <= time.time_ns() - lag for version in versions)
+
+
+def bump_post_feeds(*group_ids, author_id=None):
+    """Сбрасывает общую ленту, ленты сообществ поста и ленту автора."""
+    slugs = Group.objects.filter(
+        pk__in=[group_id for group_id in group_ids if group_id]
+    ).values_list('slug', flat=True)
+    feeds = [INDEX_FEED, *map(group_feed_name, slugs)]
+    if author_id is not None:
+        feeds += author_feeds(author_id)
+    bump_feeds(*feeds)
+
+
+def author_feeds(*user_ids):
+    usernames = User.objects.filter(
+        pk__in=user_ids).values_list('username', flat=True)
+    return [author_feed_name(username) for username in usernames]
+
+
+def page_cache_key(request, feed, version):
+    # Ключ — путь и параметры паджинации; прочие параметры не дробят кэш
+    position = '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in ('page', 'cursor')
+    )
+    url = hashlib.md5(f'{request.path}?{position}'.encode()).hexdigest()
+    return f'feed_page:{feed}:{version}:{url}'
+
+
+def cache_anonymous_page(feed_name):
+    """Кэширует страницу ленты целиком для анонимных GET-запросов.
+
+    ``feed_name(**view_kwargs)`` возвращает имя ленты, версию которой
+    меняют новые посты, правки и комментарии (см. ``bump_feeds``).
+    Без общего кэша (``CORE_CACHE_SHARED``) не кэширует: новая версия
+    не дошла бы до остальных воркеров."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method != 'GET' or request.user.is_authenticated
+                    or not settings.CORE_CACHE_SHARED):
+                return view(request, *args, **kwargs)
+            feed = feed_name(**kwargs)
+            version = feed_version(feed)
+            key = page_cache_key(request, feed, version)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.cookies
+                    and settled(version)):
+                cache.set(key, (response.content, response['Content-Type']),
+                          settings.POSTS_PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+# Валидаторы для условных GET (``django.views.decorators.http.condition``).
+# ETag слабый: маска CSRF-токена меняется от раза к разу, но по смыслу
+# страница та же. Читатель входит в ETag, потому что шапка и кнопки подписки
+# у всех свои, а секрет CSRF — потому что он меняется при входе и выходе,
+# и 304 не должен оставить в браузере формы со старым токеном. Версии лент
+# меняют те же сигналы, что сбрасывают кэш страниц.
+
+def _csrf_tag(request):
+    secret = request.META.get('CSRF_COOKIE')
+    if not secret:
+        return 0
+    return hashlib.md5(secret.encode()).hexdigest()[:8]
+
+
+def _etag(request, *versions):
+    request.feed_versions = versions
+    parts = [*versions, request.user.pk or 0, _csrf_tag(request)]
+    return 'W/"%s"' % '.'.join(map(str, parts))
+
+
+def conditional_page(etag_func):
+    """``condition(etag_func=...)`` для страниц лент. ETag не отдаётся
+    со страницей, которую ``settled`` не разрешает сохранять, и вовсе
+    без общего кэша (``CORE_CACHE_SHARED``): браузер получал бы по нему
+    304 и так и показывал бы старое."""
+    def decorator(view):
+        conditional = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.CORE_CACHE_SHARED:
+                return view(request, *args, **kwargs)
+            response = conditional(request, *args, **kwargs)
+            versions = getattr(request, 'feed_versions', ())
+            if response.status_code == 200 and not settled(*versions):
+                del response['ETag']
+            return response
+        return wrapper
+    return decorator
+
+
+def index_etag(request):
+    return _etag(request, feed_version(INDEX_FEED))
+
+
+def group_etag(request, slug):
+    return _etag(request, feed_version(group_feed_name(slug)))
+
+
+def profile_etag(request, username):
+    return _etag(request, feed_version(author_feed_name(username)))
+
+
+def post_etag(request, username, post_id):
+    # Правки, комментарии и миниатюры поста меняют и версию ленты автора
+    return _etag(request, feed_version(author_feed_name(username)))
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+def recount_user(user_id):
+    """Пересчитывает счётчики пользователя по данным таблиц."""
+    counters, _ = UserCounters.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id).count(),
+        }
+    )
+    return counters
+
+
+def change_user_counter(user_id, field, delta):
+    # Строки нет — счётчики посчитаются при первом чтении
+    UserCounters.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+
+
+def change_comment_count(post_id, delta):
+    # Новая версия сбрасывает закэшированную карточку поста
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta,
+        version=F('version') + 1,
+    )
+
+
+def bump_post_version(post_id):
+    Post.objects.filter(pk=post_id).update(version=F('version') + 1)
+
+
+def get_user_counters(user):
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return recount_user(user.pk)
+
+
+def _count_of(queryset, field):
+    """Подзапрос: сколько строк ``queryset`` ссылаются полем ``field``
+    на внешнюю строку."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+@transaction.atomic
+def rebuild_counters():
+    """Полностью пересобирает счётчики; возвращает число
+    постов с комментариями и пользователей."""
+    # Один UPDATE и один проход по пользователям вместо запроса
+    # на каждый пост и JOIN-ов, перемножающих строки
+    Post.objects.update(
+        comment_count=_count_of(Comment.objects, 'post'),
+        version=F('version') + 1,
+    )
+    posts = Post.objects.filter(comment_count__gt=0).count()
+    UserCounters.objects.all().delete()
+    users = User.objects.annotate(
+        total_posts=_count_of(Post.objects, 'author'),
+        total_followers=_count_of(Follow.objects, 'author'),
+        total_following=_count_of(Follow.objects, 'user'),
+    ).values_list('pk', 'total_posts', 'total_followers', 'total_following')
+    created = UserCounters.objects.bulk_create(
+        (UserCounters(user_id=user_id,
+                      posts_count=total_posts,
+                      followers_count=total_followers,
+                      following_count=total_following)
+         for user_id, total_posts, total_followers, total_following
+         in users.iterator()),
+        batch_size=500,
+    )
+    return posts, len(created)
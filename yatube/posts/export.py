@@ -0,0 +1,100 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Follow, Post
+
+# Поля совпадают с форматом import_posts: выгрузку можно загрузить обратно
+COLUMNS = {
+    'posts': (
+        ('id', 'id'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+    ),
+    'comments': (
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    ),
+    'follows': (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    ),
+}
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def parse_bound(value):
+    """Дата или дата со временем из параметра фильтра."""
+    date = parse_datetime(value)
+    if date is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'неверная дата {value!r}')
+        date = datetime.combine(day, time.min)
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+def export_queryset(kind, author=None, group=None, since=None, until=None):
+    """Строки выгрузки в порядке pk. Фильтры относятся к постам:
+    комментарии выгружаются для подходящих постов, у подписок
+    учитывается только автор; ``until`` не включается."""
+    if kind not in COLUMNS:
+        raise ValueError(f'неизвестный тип {kind!r}')
+    if kind == 'follows':
+        queryset = Follow.objects.all()
+        if author:
+            queryset = queryset.filter(author__username=author)
+    else:
+        post = '' if kind == 'posts' else 'post__'
+        conditions = {
+            f'{post}author__username': author,
+            f'{post}group__slug': group,
+            f'{post}pub_date__gte': since and parse_bound(since),
+            f'{post}pub_date__lt': until and parse_bound(until),
+        }
+        model = Post if kind == 'posts' else Comment
+        queryset = model.objects.filter(**{
+            lookup: value for lookup, value in conditions.items() if value
+        })
+    fields = [field for _, field in COLUMNS[kind]]
+    return queryset.order_by('pk').values_list(*fields)
+
+
+class Echo:
+    """Буфер для csv.writer, который просто возвращает записанное."""
+
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def serialize(kind, rows, data_format):
+    """Построчно сериализует ``rows`` в JSONL или CSV."""
+    header = [name for name, _ in COLUMNS[kind]]
+    if data_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(map(_plain, row))
+        return
+    for row in rows:
+        record = dict(zip(header, map(_plain, row)))
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def export_lines(kind, data_format='jsonl', chunk_size=2000, **filters):
+    rows = export_queryset(kind, **filters).iterator(chunk_size=chunk_size)
+    return serialize(kind, rows, data_format)
@@ -0,0 +1,46 @@
+from .models import Post, TimelineEntry
+
+# Порядок записей ленты подписок; post_id совпадает с id поста, так что
+# это тот же порядок, что FEED_ORDERING у постов
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+
+
+def feed(queryset=None):
+    """Общая основа запросов лент: автор и сообщество подтягиваются
+    JOIN-ом, число комментариев хранится в ``Post.comment_count``,
+    так что карточка поста не делает дополнительных запросов."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    return queryset.select_related('author', 'group')
+
+
+def index_feed():
+    return feed()
+
+
+def group_feed(group):
+    return feed(Post.objects.filter(group=group))
+
+
+def profile_feed(author):
+    return feed(Post.objects.filter(author=author))
+
+
+def follow_feed(user):
+    """Записи материализованной ленты подписок (см. posts.timeline).
+    Страница выбирается по индексу ``(user, pub_date, post)`` без JOIN
+    и сортировки, посты к ней догружает ``timeline_posts``."""
+    return TimelineEntry.objects.filter(user=user).order_by(
+        *TIMELINE_ORDERING)
+
+
+def timeline_posts(entries, queryset=None):
+    """Посты записей ленты подписок в порядке записей. ``queryset`` —
+    основа выборки постов, например ``.values()`` для API."""
+    ids = [entry.post_id for entry in entries]
+    if queryset is None:
+        queryset = feed()
+    posts = {}
+    for post in queryset.filter(pk__in=ids).order_by():
+        posts[post['id'] if isinstance(post, dict) else post.pk] = post
+    return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,152 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from . import timeline
+from .caching import author_feeds, bump_feeds
+from .counters import change_user_counter
+from .models import Follow
+
+TABLE = Follow._meta.db_table
+
+# Граф подписок в кэше: для каждого пользователя — множества id
+# подписчиков и авторов, упакованные в массив 32-битных чисел
+FOLLOWERS = 'followers'
+FOLLOWING = 'following'
+COLUMNS = {FOLLOWERS: ('author_id', 'user_id'),
+           FOLLOWING: ('user_id', 'author_id')}
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+def _key(kind, user_id):
+    return f'follow_graph:{kind}:{user_id}'
+
+
+def _pack(ids):
+    ids = sorted(ids)
+    typecode = 'I' if not ids or ids[-1] < 2 ** 32 else 'Q'
+    return typecode.encode() + array(typecode, ids).tobytes()
+
+
+def _unpack(data):
+    ids = array(data[:1].decode())
+    ids.frombytes(data[1:])
+    return frozenset(ids)
+
+
+def _load(kind, user_ids):
+    """Множества ``kind`` для пользователей: из кэша одним get_many,
+    недостающие — из базы с записью в кэш. Без общего кэша — только
+    из базы: сброс в одном воркере не дошёл бы до остальных."""
+    found = {}
+    if settings.CORE_CACHE_SHARED:
+        keys = {_key(kind, user_id): user_id for user_id in user_ids}
+        found = {keys[key]: _unpack(data)
+                 for key, data in cache.get_many(keys).items()}
+    missing = [user_id for user_id in user_ids if user_id not in found]
+    if missing:
+        owner, other = COLUMNS[kind]
+        loaded = {user_id: set() for user_id in missing}
+        rows = Follow.objects.filter(
+            **{f'{owner}__in': missing}).values_list(owner, other)
+        for owner_id, other_id in rows.iterator():
+            loaded[owner_id].add(other_id)
+        if settings.CORE_CACHE_SHARED:
+            cache.set_many(
+                {_key(kind, user_id): _pack(ids)
+                 for user_id, ids in loaded.items()},
+                settings.POSTS_FOLLOW_GRAPH_TIMEOUT,
+            )
+        found.update((user_id, frozenset(ids))
+                     for user_id, ids in loaded.items())
+    return found
+
+
+def followers(user):
+    user_id = _user_id(user)
+    return _load(FOLLOWERS, [user_id])[user_id]
+
+
+def following(user):
+    user_id = _user_id(user)
+    return _load(FOLLOWING, [user_id])[user_id]
+
+
+def is_following(user, author):
+    if _user_id(user) is None:
+        return False
+    return _user_id(author) in following(user)
+
+
+def mutuals(user):
+    """Пользователи, с которыми подписка взаимная."""
+    return followers(user) & following(user)
+
+
+def invalidate(user_id, author_id):
+    keys = [_key(FOLLOWING, user_id), _key(FOLLOWERS, author_id)]
+    cache.delete_many(keys)
+    # Счётчики и кнопка подписки в профилях обоих изменились. Версии лент
+    # меняются только после коммита: иначе читатель успеет закэшировать
+    # под новой версией страницу без подписки
+    feeds = author_feeds(user_id, author_id)
+
+    def committed():
+        # Читатель мог успеть закэшировать состояние до коммита
+        cache.delete_many(keys)
+        bump_feeds(*feeds)
+
+    transaction.on_commit(committed)
+
+
+def follow_added(user_id, author_id):
+    change_user_counter(author_id, 'followers_count', 1)
+    change_user_counter(user_id, 'following_count', 1)
+    timeline.backfill(user_id, author_id)
+    invalidate(user_id, author_id)
+
+
+def follow_removed(user_id, author_id):
+    change_user_counter(author_id, 'followers_count', -1)
+    change_user_counter(user_id, 'following_count', -1)
+    timeline.remove_author(user_id, author_id)
+    invalidate(user_id, author_id)
+
+
+@transaction.atomic
+def follow(user_id, author_id):
+    """Подписывает одним INSERT, повтор игнорируется уникальным
+    ограничением; возвращает True, если подписка появилась."""
+    if user_id == author_id:
+        return False
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} {TABLE} '
+            f'(user_id, author_id) VALUES (%s, %s)'
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            [user_id, author_id],
+        )
+        created = cursor.rowcount == 1
+    if created:
+        follow_added(user_id, author_id)
+    return created
+
+
+@transaction.atomic
+def unfollow(user_id, author_id):
+    """Отписывает одним DELETE; возвращает True, если подписка была."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE user_id = %s AND author_id = %s',
+            [user_id, author_id],
+        )
+        deleted = cursor.rowcount == 1
+    if deleted:
+        follow_removed(user_id, author_id)
+    return deleted
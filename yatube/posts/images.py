@@ -0,0 +1,89 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+# Форматы, которые отдаются браузеру как есть; остальное перекодируем в JPEG
+WEB_FORMATS = {
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'PNG': ('.png', 'image/png'),
+    'GIF': ('.gif', 'image/gif'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+
+
+def check_upload(upload):
+    """Отсекает слишком большие файлы и картинки до декодирования:
+    размеры берутся из заголовка файла."""
+    if upload.size > settings.POSTS_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл слишком большой: не больше %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.POSTS_IMAGE_MAX_UPLOAD_SIZE // 2 ** 20},
+        )
+    upload.seek(0)
+    with Image.open(upload) as header:
+        width, height = header.size
+    if width * height > settings.POSTS_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка слишком большая: %(width)s×%(height)s.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+
+
+def reencode(upload):
+    """Сохраняет уменьшенную до ``POSTS_IMAGE_MAX_SIDE`` копию без
+    метаданных (EXIF, комментарии), с учётом поворота из EXIF."""
+    # Обрезанный или битый файл проходит проверку заголовка и ломается
+    # только при декодировании пикселей
+    try:
+        return _reencode(upload)
+    except (OSError, Image.DecompressionBombError, ValueError) as error:
+        raise ValidationError(
+            'Не удалось прочитать картинку: файл повреждён.',
+            code='invalid_image',
+        ) from error
+
+
+def _reencode(upload):
+    upload.seek(0)
+    with Image.open(upload) as source:
+        image_format = source.format
+        if getattr(source, 'is_animated', False):
+            # Анимацию кадр за кадром не пересобираем
+            upload.seek(0)
+            return upload
+        # Из служебных данных переносим только цветовой профиль
+        # и прозрачность
+        options = {name: source.info[name]
+                   for name in ('icc_profile', 'transparency')
+                   if name in source.info}
+        # thumbnail() до загрузки пикселей позволяет JPEG-декодеру
+        # сразу читать уменьшенную копию
+        source.thumbnail((settings.POSTS_IMAGE_MAX_SIDE,) * 2)
+        image = ImageOps.exif_transpose(source)
+
+    if image_format not in WEB_FORMATS:
+        image_format = 'JPEG'
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.POSTS_IMAGE_QUALITY
+    if image_format == 'JPEG':
+        options.update(optimize=True, progressive=True)
+        options.pop('transparency', None)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    content = io.BytesIO()
+    image.save(content, format=image_format, **options)
+
+    extension, content_type = WEB_FORMATS[image_format]
+    name = os.path.splitext(os.path.basename(upload.name))[0] + extension
+    return SimpleUploadedFile(name, content.getvalue(), content_type)
+
+
+def ingest_image(upload):
+    check_upload(upload)
+    return reencode(upload)
@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Max, Min
+from django.test.utils import override_settings
+
+from core.db import pragma_values
+from posts.feeds import index_feed
+from posts.models import Comment, Post, UserCounters
+
+from .bench_views import percentile
+
+# Соединение «как из коробки»: журнал отката, полный fsync, без mmap
+BASELINE_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+SHOWN_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout',
+                 'cache_size', 'mmap_size')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность SQLite при одновременных '
+            'чтениях лент и записи комментариев из нескольких потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--baseline', action='store_true',
+                            help='Без настроек CORE_SQLITE_PRAGMAS: '
+                                 'журнал отката и synchronous=FULL.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def read(self, rng):
+        list(index_feed()[:settings.POSTS_PER_PAGE])
+        post_id = rng.randint(*self.post_range)
+        list(Comment.objects.filter(post_id=post_id).select_related(
+            'author')[:settings.POSTS_COMMENTS_PER_PAGE])
+
+    def write(self, rng):
+        # Как add_comment: вставка плюс счётчики, версия и поиск в сигналах
+        Comment.objects.create(post_id=rng.randint(*self.post_range),
+                               author_id=rng.choice(self.user_ids),
+                               text='bench_concurrency')
+
+    def worker(self, kind, seed, deadline, barrier):
+        rng = random.Random(seed)
+        operation = self.read if kind == 'read' else self.write
+        timings, errors = [], 0
+        try:
+            barrier.wait()
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation(rng)
+                except OperationalError:
+                    # database is locked — не дождались busy_timeout
+                    errors += 1
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connections.close_all()
+        with self.lock:
+            self.results[kind]['timings'] += timings
+            self.results[kind]['errors'] += errors
+
+    def run(self, readers, writers, seconds, seed):
+        self.results = {kind: {'timings': [], 'errors': 0}
+                        for kind in ('read', 'write')}
+        self.lock = threading.Lock()
+        kinds = ['read'] * readers + ['write'] * writers
+        barrier = threading.Barrier(len(kinds))
+        deadline = time.perf_counter() + seconds + 0.1
+        threads = [
+            threading.Thread(target=self.worker,
+                             args=(kind, seed + number, deadline, barrier))
+            for number, kind in enumerate(kinds)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def report(self, seconds):
+        self.stdout.write(f'{"":<7}{"оп.":>8}{"оп./с":>9}{"p50":>9}'
+                          f'{"p95":>9}{"p99":>9}{"ошибок":>8}')
+        for kind, result in self.results.items():
+            timings = result['timings']
+            if not timings and not result['errors']:
+                continue
+            stats = [percentile(timings, q) if timings else 0
+                     for q in (0.5, 0.95, 0.99)]
+            self.stdout.write(
+                f'{kind:<7}{len(timings):>8}{len(timings) / seconds:>9.1f}'
+                + ''.join(f'{value:>9.2f}' for value in stats)
+                + f'{result["errors"]:>8}'
+            )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            raise CommandError('Нужна SQLite-база в файле.')
+        if options['readers'] < 0 or options['writers'] < 0 or (
+                options['readers'] + options['writers'] == 0):
+            raise CommandError('Нужен хотя бы один поток.')
+        bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            raise CommandError('В базе нет постов — '
+                               'сначала запустите seed_bench.')
+        self.post_range = (bounds['low'], bounds['high'])
+        self.user_ids = list(UserCounters.objects.values_list(
+            'user_id', flat=True)[:1000])
+
+        pragmas = settings.CORE_SQLITE_PRAGMAS
+        if options['baseline']:
+            pragmas = BASELINE_PRAGMAS
+        # Режим журнала меняется, только пока других соединений нет
+        connections.close_all()
+        with override_settings(CORE_SQLITE_PRAGMAS=pragmas):
+            values = pragma_values(connection, SHOWN_PRAGMAS)
+            self.stdout.write(', '.join(f'{name}={value}'
+                                        for name, value in values.items()))
+            connections.close_all()
+            self.run(options['readers'], options['writers'],
+                     options['seconds'], options['seed'])
+        self.report(options['seconds'])
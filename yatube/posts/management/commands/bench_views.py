@@ -0,0 +1,131 @@
+import json
+import math
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, UserCounters
+
+User = get_user_model()
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_view', 'follow_index')
+
+
+def percentile(values, q):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку (перцентили) и число SQL-запросов '
+            'основных страниц на разной глубине паджинации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', default=','.join(VIEWS),
+                            help='Через запятую, из: ' + ', '.join(VIEWS))
+        parser.add_argument('--pages', default='1,10,100',
+                            help='Номера страниц для лент через запятую.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--username',
+                            help='Читатель; по умолчанию тот, у кого '
+                                 'больше всего подписок.')
+        parser.add_argument('--anonymous', action='store_true',
+                            help='Запросы без входа (кэш страниц включён).')
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результаты в JSON.')
+
+    def reader(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Пользователь {username} не найден.')
+            return user
+        counters = UserCounters.objects.select_related('user').order_by(
+            '-following_count').first()
+        if counters is None:
+            raise CommandError('В базе нет пользователей — '
+                               'сначала запустите seed_bench.')
+        return counters.user
+
+    def urls(self, views, pages):
+        author = User.objects.get(pk=UserCounters.objects.order_by(
+            '-posts_count').values('user_id')[:1])
+        group = Group.objects.order_by('-pk').first()
+        post = Post.objects.select_related('author').order_by(
+            '-comment_count').first()
+        paged = {
+            'index': reverse('index'),
+            'profile': reverse('profile', args=[author.username]),
+            'follow_index': reverse('follow_index'),
+        }
+        if group is not None:
+            paged['group_posts'] = reverse('posts', args=[group.slug])
+        for view in views:
+            if view == 'post_view':
+                if post is not None:
+                    yield view, None, reverse(
+                        'post', args=[post.author.username, post.pk])
+            elif view in paged:
+                for page in pages:
+                    yield view, page, f'{paged[view]}?page={page}'
+
+    def measure(self, client, url, repeat, warmup):
+        for _ in range(warmup):
+            client.get(url)
+        timings, queries = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: код ответа '
+                                   f'{response.status_code}.')
+            queries.append(len(captured))
+        return {
+            'p50': round(percentile(timings, 0.5), 2),
+            'p95': round(percentile(timings, 0.95), 2),
+            'p99': round(percentile(timings, 0.99), 2),
+            'max': round(max(timings), 2),
+            'queries': max(queries),
+        }
+
+    def handle(self, *args, **options):
+        views = [view.strip() for view in options['views'].split(',')]
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise CommandError(f'Неизвестные страницы: {", ".join(unknown)}')
+        pages = [int(page) for page in options['pages'].split(',')]
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть не меньше 1.')
+
+        client = Client()
+        reader = self.reader(options['username'])
+        if options['anonymous']:
+            views = [view for view in views if view != 'follow_index']
+        else:
+            client.force_login(reader)
+
+        results = []
+        for view, page, url in self.urls(views, pages):
+            stats = self.measure(client, url, options['repeat'],
+                                 options['warmup'])
+            results.append({'view': view, 'page': page, 'url': url, **stats})
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"страница":<14}{"page":>6}{"p50":>9}{"p95":>9}'
+                          f'{"p99":>9}{"max":>9}{"SQL":>5}')
+        for row in results:
+            self.stdout.write(
+                f'{row["view"]:<14}{row["page"] or "-":>6}'
+                f'{row["p50"]:>9}{row["p95"]:>9}{row["p99"]:>9}'
+                f'{row["max"]:>9}{row["queries"]:>5}'
+            )
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.feeds import (TIMELINE_ORDERING, feed, follow_feed, group_feed,
+                         index_feed, profile_feed)
+from posts.models import Follow, Group, Post, UserCounters
+from posts.pagination import COMMENT_ORDERING, FEED_ORDERING
+
+User = get_user_model()
+
+
+def counted(queryset):
+    # Paginator.count делает COUNT(*) без JOIN-ов select_related и сортировки
+    return queryset.select_related(None).order_by().values('pk')
+
+
+def cursor_page(queryset, ordering=FEED_ORDERING):
+    # Первая страница keyset-паджинации и JSON API
+    return queryset.order_by(*ordering)[:settings.POSTS_PER_PAGE + 1]
+
+
+def is_full_scan(line):
+    # SQLite: «SCAN posts_post» без индекса или сортировка во временном
+    # B-дереве — то, что на больших таблицах растёт линейно
+    return ('SCAN' in line and 'INDEX' not in line) or 'TEMP B-TREE' in line
+
+
+class Command(BaseCommand):
+    help = ('Печатает EXPLAIN QUERY PLAN для запросов лент, профиля '
+            'и страницы поста.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='Автор для профиля и ленты.')
+        parser.add_argument('--group', help='Slug сообщества.')
+        parser.add_argument('--page', type=int, default=1,
+                            help='Номер страницы для OFFSET-запросов.')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Завершиться с ошибкой при полном скане.')
+
+    def view_queries(self, user, group, post, page):
+        per_page = settings.POSTS_PER_PAGE
+        offset = (page - 1) * per_page
+        window = slice(offset, offset + per_page)
+        queries = {
+            'index': [
+                ('count', counted(index_feed())),
+                ('page', index_feed()[window]),
+                ('cursor', cursor_page(index_feed())),
+            ],
+            'profile': [
+                ('author', User.objects.filter(username=user.username)),
+                ('counters', UserCounters.objects.filter(user=user)),
+                ('count', counted(profile_feed(user))),
+                ('page', profile_feed(user)[window]),
+                ('cursor', cursor_page(profile_feed(user))),
+                # Промах кэша графа подписок (posts.follows)
+                ('following', Follow.objects.filter(
+                    user_id__in=[user.pk]).values_list('user_id',
+                                                       'author_id')),
+            ],
+            'post_view': [
+                ('post', feed().filter(author__username=post.author.username,
+                                       id=post.id).order_by()),
+                ('comments', post.comments.select_related('author')
+                 .order_by(*COMMENT_ORDERING)
+                 [:settings.POSTS_COMMENTS_PER_PAGE + 1]),
+            ],
+            'follow_index': [
+                ('count', counted(follow_feed(user))),
+                ('page', follow_feed(user)[window]),
+                ('cursor', cursor_page(follow_feed(user), TIMELINE_ORDERING)),
+                # Посты страницы догружаются по id (feeds.timeline_posts)
+                ('posts', feed().filter(pk__in=list(
+                    follow_feed(user).values_list('post_id', flat=True)
+                    [window]) or [post.id]).order_by()),
+            ],
+        }
+        if group is not None:
+            queries['group_posts'] = [
+                ('group', Group.objects.filter(slug=group.slug)),
+                ('count', counted(group_feed(group))),
+                ('page', group_feed(group)[window]),
+                ('cursor', cursor_page(group_feed(group))),
+            ]
+        return queries
+
+    def sample_objects(self, options):
+        post = Post.objects.select_related('author').first()
+        if post is None:
+            raise CommandError('В базе нет постов — нечего объяснять.')
+        user = post.author
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(
+                    f'Пользователь {options["username"]} не найден.')
+        group = Group.objects.first()
+        if options['group']:
+            group = Group.objects.filter(slug=options['group']).first()
+            if group is None:
+                raise CommandError(
+                    f'Сообщество {options["group"]} не найдено.')
+        return user, group, post
+
+    def handle(self, *args, **options):
+        user, group, post = self.sample_objects(options)
+        scans = 0
+        queries = self.view_queries(user, group, post, options['page'])
+        for view, view_queries in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{view}:'))
+            for label, queryset in view_queries:
+                self.stdout.write(f'  {label}')
+                for line in queryset.explain().splitlines():
+                    if is_full_scan(line):
+                        scans += 1
+                        line = self.style.WARNING(line)
+                    self.stdout.write(f'    {line}')
+        if scans and options['fail_on_scan']:
+            raise CommandError(f'Полных сканов в планах: {scans}.')
+        self.stdout.write(f'Полных сканов в планах: {scans}.')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import COLUMNS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = ('Построчно выгружает посты, комментарии или подписки '
+            'в JSONL или CSV, не загружая таблицу в память.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=tuple(COLUMNS))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--author', help='Username автора.')
+        parser.add_argument('--group', help='Slug сообщества.')
+        parser.add_argument('--since', help='С даты (включительно).')
+        parser.add_argument('--until', help='До даты (не включая).')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            lines = export_lines(
+                options['kind'], options['format'], options['chunk_size'],
+                author=options['author'], group=options['group'],
+                since=options['since'], until=options['until'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
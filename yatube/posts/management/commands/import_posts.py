@@ -0,0 +1,182 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import explicit_dates, insert_batches, next_id, rebuild_derived
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Порядок загрузки: каждая сущность ссылается только на предыдущие
+KINDS = ('users', 'groups', 'posts', 'comments', 'follows')
+
+
+@contextmanager
+def open_records(path, data_format=None):
+    """Построчно читает записи из JSONL или CSV (формат — по расширению);
+    ``-`` — стандартный ввод."""
+    if data_format is None:
+        data_format = 'csv' if path.endswith('.csv') else 'jsonl'
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8',
+                                                newline='')
+    try:
+        if data_format == 'csv':
+            yield csv.DictReader(stream)
+        else:
+            yield (json.loads(line) for line in stream if line.strip())
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'неверная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Command(BaseCommand):
+    help = ('Массово загружает пользователей, сообщества, посты, '
+            'комментарии и подписки из JSONL или CSV.')
+
+    def add_arguments(self, parser):
+        for kind in KINDS:
+            parser.add_argument(f'--{kind}', metavar='PATH',
+                                help=f'Файл с записями ({kind}).')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='Формат файлов, если не ясен по расширению.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='Не пересчитывать счётчики, ленты '
+                                 'и поисковый индекс после загрузки.')
+
+    # Превращение записей в объекты; FK ищутся в словарях в памяти
+
+    def users(self, records):
+        pk = next_id(User)
+        for record in records:
+            username = record['username']
+            if username in self.user_ids:
+                self.skipped['users'] += 1
+                continue
+            self.user_ids[username] = pk
+            yield User(pk=pk, username=username,
+                       email=record.get('email') or '',
+                       first_name=record.get('first_name') or '',
+                       last_name=record.get('last_name') or '',
+                       password=make_password(None))
+            pk += 1
+
+    def groups(self, records):
+        pk = next_id(Group)
+        for record in records:
+            slug = record['slug']
+            if slug in self.group_ids:
+                self.skipped['groups'] += 1
+                continue
+            self.group_ids[slug] = pk
+            yield Group(pk=pk, slug=slug, title=record.get('title') or slug,
+                        description=record.get('description') or '')
+            pk += 1
+
+    def posts(self, records):
+        pk = next_id(Post)
+        for record in records:
+            author_id = self.user_ids.get(record['author'])
+            group = record.get('group')
+            group_id = self.group_ids.get(group) if group else None
+            if author_id is None or (group and group_id is None):
+                self.skipped['posts'] += 1
+                continue
+            if record.get('id') not in (None, ''):
+                self.post_ids[str(record['id'])] = pk
+            yield Post(pk=pk, author_id=author_id, group_id=group_id,
+                       text=record['text'],
+                       pub_date=parse_date(record.get('pub_date')))
+            pk += 1
+
+    def comments(self, records):
+        for record in records:
+            post_id = self.post_ids.get(str(record['post']))
+            author_id = self.user_ids.get(record['author'])
+            if post_id is None or author_id is None:
+                self.skipped['comments'] += 1
+                continue
+            yield Comment(post_id=post_id, author_id=author_id,
+                          text=record['text'],
+                          created=parse_date(record.get('created')))
+
+    def follows(self, records):
+        for record in records:
+            user_id = self.user_ids.get(record['user'])
+            author_id = self.user_ids.get(record['author'])
+            if user_id is None or author_id is None or user_id == author_id:
+                self.skipped['follows'] += 1
+                continue
+            yield Follow(user_id=user_id, author_id=author_id)
+
+    def load(self, kind, path, options):
+        model = {'users': User, 'groups': Group, 'posts': Post,
+                 'comments': Comment, 'follows': Follow}[kind]
+        started = time.perf_counter()
+        with open_records(path, options['format']) as records:
+            try:
+                total = insert_batches(
+                    model, getattr(self, kind)(records),
+                    options['batch_size'],
+                    ignore_conflicts=model is Follow,
+                )
+            except (KeyError, ValueError) as exc:
+                raise CommandError(f'{path}: ошибка в записи: {exc}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{kind}: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с), '
+            f'пропущено {self.skipped[kind]}'
+        )
+        return total
+
+    def handle(self, *args, **options):
+        paths = {kind: options[kind] for kind in KINDS if options[kind]}
+        if not paths:
+            raise CommandError('Укажите хотя бы один файл: '
+                               + ', '.join(f'--{kind}' for kind in KINDS))
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1.')
+        self.skipped = Counter()
+        self.user_ids = dict(
+            User.objects.values_list('username', 'pk').iterator())
+        self.group_ids = dict(
+            Group.objects.values_list('slug', 'pk').iterator())
+        self.post_ids = {}
+
+        started = time.perf_counter()
+        total = 0
+        try:
+            with explicit_dates():
+                for kind, path in paths.items():
+                    total += self.load(kind, path, options)
+        finally:
+            # Пачки коммитятся по одной: и после ошибки в середине файла
+            # счётчики, ленты и поиск должны учесть уже загруженное
+            if not options['no_rebuild']:
+                rebuild_derived()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с).'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Полнотекстовый поиск работает только '
+                               'на SQLite с FTS5.')
+        posts, comments = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс перестроен: постов — {posts}, '
+            f'комментариев — {comments}.'
+        ))
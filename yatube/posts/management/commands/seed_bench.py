@@ -0,0 +1,142 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.bulk import explicit_dates, insert_batches, next_id, rebuild_derived
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+WORDS = (
+    'город море лес река утро вечер ночь дорога дом окно книга музыка '
+    'кофе чай друг работа отпуск поезд самолёт горы снег солнце дождь '
+    'кот собака сад поле небо звезда ракета старт код python django '
+    'база запрос индекс лента пост комментарий подписка новости день'
+).split()
+
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, сообществами, '
+            'постами, комментариями и подписками для бенчмарков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить посты.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='bench',
+                            help='Префикс имён пользователей и slug-ов.')
+
+    def text(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def pick_authors(self, count):
+        # Немногие авторы пишут много и собирают большинство подписчиков
+        return self.rng.choices(self.user_ids, self.popularity, k=count)
+
+    def users(self, count):
+        first = next_id(User)
+        # Хэш один на всех: PBKDF2 на каждого заняло бы минуты
+        password = make_password(PASSWORD)
+        self.user_ids = list(range(first, first + count))
+        self.popularity = [rank ** -0.5 for rank in range(1, count + 1)]
+        return (User(pk=pk, username=f'{self.prefix}{pk}', password=password)
+                for pk in self.user_ids)
+
+    def groups(self, count):
+        first = next_id(Group)
+        self.group_ids = list(range(first, first + count))
+        return (Group(pk=pk, title=f'Сообщество {pk}',
+                      slug=f'{self.prefix}-{pk}', description=self.text(5, 20))
+                for pk in self.group_ids)
+
+    def posts(self, count, days):
+        first = next_id(Post)
+        self.post_ids = range(first, first + count)
+        self.started = timezone.now() - timedelta(days=days)
+        self.step = timedelta(days=days) / max(count, 1)
+        for pk, author_id in zip(self.post_ids, self.pick_authors(count)):
+            group_id = None
+            if self.group_ids and self.rng.random() < 0.7:
+                group_id = self.rng.choice(self.group_ids)
+            yield Post(pk=pk, author_id=author_id, group_id=group_id,
+                       text=self.text(5, 60), pub_date=self.post_date(pk))
+
+    def post_date(self, post_id):
+        # Даты растут вместе с id, как у настоящих постов
+        return self.started + self.step * (post_id - self.post_ids.start)
+
+    def comments(self, count):
+        for post_id in self.rng.choices(self.post_ids, k=count):
+            yield Comment(
+                post_id=post_id, author_id=self.rng.choice(self.user_ids),
+                text=self.text(2, 20),
+                created=self.post_date(post_id) + timedelta(
+                    minutes=self.rng.randint(1, 60 * 24)),
+            )
+
+    def follows(self, count):
+        # Не больше половины возможных пар, иначе подбор редких авторов
+        # растянется надолго
+        count = min(count, len(self.user_ids) * (len(self.user_ids) - 1) // 2)
+        pairs = set()
+        while len(pairs) < count:
+            user_id = self.rng.choice(self.user_ids)
+            author_id, = self.pick_authors(1)
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        return (Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in sorted(pairs))
+
+    def insert(self, model, objects):
+        started = time.perf_counter()
+        total = insert_batches(model, objects, self.batch_size,
+                               ignore_conflicts=model is Follow)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {total} '
+            f'за {elapsed:.1f} с ({total / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        if options['comments'] and not options['posts']:
+            raise CommandError('Комментариям нужны посты.')
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        if User.objects.filter(
+                username__startswith=self.prefix).exists():
+            raise CommandError(
+                f'Пользователи с префиксом {self.prefix} уже есть — '
+                'выберите другой --prefix.')
+
+        self.insert(User, self.users(options['users']))
+        self.insert(Group, self.groups(options['groups']))
+        with explicit_dates():
+            self.insert(Post, self.posts(options['posts'], options['days']))
+            self.insert(Comment, self.comments(options['comments']))
+        self.insert(Follow, self.follows(options['follows']))
+
+        started = time.perf_counter()
+        rebuild_derived()
+        self.stdout.write(
+            f'Счётчики, ленты и индекс пересобраны за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово. Пароль пользователей {self.prefix}*: {PASSWORD}'
+        ))
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # Полнотекстовый индекс есть только в SQLite (FTS5)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE posts_search USING fts5('
+        'post_id UNINDEXED, post_text, comment_text, '
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # Текст поста весит вдвое больше комментариев
+    schema_editor.execute(
+        "INSERT INTO posts_search (posts_search, rank) "
+        "VALUES ('rank', 'bm25(0, 2.0, 1.0)')"
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_search (rowid, post_id, post_text) '
+        'SELECT id, id, text FROM posts_post'
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_search (rowid, post_id, comment_text) '
+        'SELECT -id, post_id, text FROM posts_comment'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
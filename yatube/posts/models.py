@@ -22,6 +22,14 @@ class Group(models.Model):
 class Post(models.Model):
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            # id — вторая часть ключа keyset-паджинации (FEED_ORDERING)
+            models.Index(fields=["-pub_date", "-id"], name="post_pub_date"),
+            models.Index(fields=["author", "-pub_date", "-id"],
+                         name="post_author_pub_date"),
+            models.Index(fields=["group", "-pub_date", "-id"],
+                         name="post_group_pub_date"),
+        ]
 
     group = models.ForeignKey(
         Group, null=True, blank=True,
@@ -38,12 +46,24 @@ class Post(models.Model):
         User, on_delete=models.CASCADE, related_name="posts"
     )
     image = models.ImageField(upload_to="posts/", blank=True)
+    comment_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество комментариев"
+    )
+    version = models.PositiveIntegerField(
+        default=1, editable=False, verbose_name="Версия карточки"
+    )
 
     def __str__(self):
         return self.text[:15]
 
 
 class Comment(models.Model):
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "created"],
+                         name="comment_post_created"),
+        ]
+
     post = models.ForeignKey(
         Post, related_name="comments",
         on_delete=models.CASCADE
@@ -59,9 +79,50 @@ class Comment(models.Model):
 
 
 class Follow(models.Model):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "author"],
+                                    name="unique_follow"),
+        ]
+
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="follower"
     )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="following"
     )
+
+
+class UserCounters(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name="counters"
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name="Записей"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписчиков"
+    )
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписок"
+    )
+
+
+class TimelineEntry(models.Model):
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = [
+            # Страница ленты подписок читается по этому индексу целиком:
+            # порядок (pub_date, post) совпадает с FEED_ORDERING постов
+            models.Index(fields=["user", "-pub_date", "-post"],
+                         name="timeline_user_pub_date"),
+        ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
@@ -0,0 +1,176 @@
+import base64
+import binascii
+import collections.abc
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('created', 'id')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница ленты, полученная по курсору (без COUNT и OFFSET)."""
+
+    cursor_based = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<CursorPage of %s items>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        if not isinstance(index, (int, slice)):
+            raise TypeError
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class CursorPaginator:
+    """Keyset-паджинатор: страница выбирается условием по ключу сортировки
+    (по умолчанию ``(pub_date, id)``), а не смещением, поэтому стоимость
+    запроса не зависит от глубины страницы."""
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        position = []
+        for name in self.fields:
+            # Строки из .values() — словари
+            value = (obj[name] if isinstance(obj, dict)
+                     else getattr(obj, name))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            position.append(value)
+        payload = json.dumps([direction, position], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, position = json.loads(
+                base64.urlsafe_b64decode(padded.encode()).decode()
+            )
+            if direction not in ('n', 'p') or (
+                    len(position) != len(self.fields)):
+                raise InvalidCursor(cursor)
+            model = self.object_list.model
+            position = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, position)
+            ]
+        except (TypeError, ValueError, binascii.Error,
+                ValidationError) as error:
+            raise InvalidCursor(cursor) from error
+        return direction, position
+
+    def _seek(self, position, reverse):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        conditions = []
+        for index, order in enumerate(self.ordering):
+            descending = order.startswith('-') != reverse
+            lookup = '%s__%s' % (self.fields[index],
+                                 'lt' if descending else 'gt')
+            equal = dict(zip(self.fields[:index], position[:index]))
+            conditions.append(Q(**equal, **{lookup: position[index]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else '-' + name
+                for name in self.ordering]
+
+    def page(self, cursor=None):
+        queryset = self.object_list
+        direction = 'n'
+        if cursor:
+            direction, position = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                self._seek(position, reverse=direction == 'p')
+            )
+        if direction == 'p':
+            queryset = queryset.order_by(*self._reversed_ordering())
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == 'p':
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self.encode_cursor(items[-1], 'n')
+        if items and has_previous:
+            previous_cursor = self.encode_cursor(items[0], 'p')
+        return CursorPage(items, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        """Как ``page()``, но битый курсор ведёт на первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+def page_window(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации: текущая ±``on_each_side`` и по
+    ``on_ends`` с каждого края, ``None`` на месте пропуска. Длина списка
+    не зависит от числа страниц."""
+    if num_pages <= (on_each_side + on_ends) * 2:
+        return list(range(1, num_pages + 1))
+    window = []
+    if number > on_each_side + on_ends + 2:
+        window += range(1, on_ends + 1)
+        window.append(None)
+        window += range(number - on_each_side, number + 1)
+    else:
+        window += range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        window += range(number + 1, number + on_each_side + 1)
+        window.append(None)
+        window += range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        window += range(number + 1, num_pages + 1)
+    return window
+
+
+def get_page(request, object_list, per_page=None, ordering=FEED_ORDERING):
+    """Страница ленты для запроса: keyset-режим включается параметром
+    ``?cursor=`` или настройкой ``POSTS_PAGINATION = 'cursor'``."""
+    per_page = per_page or settings.POSTS_PER_PAGE
+    cursor = request.GET.get('cursor')
+    if cursor is not None or settings.POSTS_PAGINATION == 'cursor':
+        return CursorPaginator(object_list, per_page,
+                               ordering).get_page(cursor)
+    paginator = Paginator(object_list, per_page)
+    return paginator.get_page(request.GET.get('page'))
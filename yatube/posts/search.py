@@ -0,0 +1,131 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .feeds import feed
+
+# Одна строка индекса на пост (rowid = id поста) и по строке на каждый
+# комментарий (rowid = -id комментария): запись комментария не требует
+# переиндексировать весь пост
+TABLE = 'posts_search'
+CREATE_TABLE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+    'post_id UNINDEXED, post_text, comment_text, '
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# Вес совпадения в тексте поста выше, чем в комментариях; функция
+# сохраняется в настройках таблицы и доступна как столбец rank
+RANK = 'bm25(0, 2.0, 1.0)'
+SET_RANK = f"INSERT INTO {TABLE} ({TABLE}, rank) VALUES ('rank', '{RANK}')"
+MAX_TERMS = 10
+
+WORD_RE = re.compile(r'\w+')
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5: все слова
+    обязательны, последнее ищется по префиксу."""
+    words = WORD_RE.findall(query.lower())[:MAX_TERMS]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def index_post(post):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, post_id, post_text) '
+            'VALUES (%s, %s, %s)',
+            [post.pk, post.pk, post.text],
+        )
+
+
+def index_comment(comment):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s',
+                       [-comment.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, post_id, comment_text) '
+            'VALUES (%s, %s, %s)',
+            [-comment.pk, comment.post_id, comment.text],
+        )
+
+
+def unindex(rowid):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+
+
+def rebuild():
+    """Заполняет индекс заново из таблиц постов и комментариев."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        cursor.execute(SET_RANK)
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, post_id, post_text) '
+            'SELECT id, id, text FROM posts_post'
+        )
+        posts = cursor.rowcount
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, post_id, comment_text) '
+            'SELECT -id, post_id, text FROM posts_comment'
+        )
+        comments = cursor.rowcount
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return posts, comments
+
+
+def matching_posts(query):
+    """Подзапрос с id подходящих постов — для ``filter(pk__in=...)``."""
+    return RawSQL(
+        f'SELECT post_id FROM {TABLE} WHERE {TABLE} MATCH %s',
+        [match_expression(query)],
+    )
+
+
+class SearchResults:
+    """Посты, отсортированные по релевантности; поддерживает ``count()``
+    и срезы, поэтому подходит для стандартного ``Paginator``."""
+
+    def __init__(self, query):
+        self.expression = match_expression(query)
+
+    def count(self):
+        if self.expression is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(DISTINCT post_id) FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s',
+                [self.expression],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, window):
+        if not isinstance(window, slice):
+            return self[window:window + 1][0]
+        if self.expression is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, MIN(rank) AS score FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s GROUP BY post_id '
+                'ORDER BY score, post_id DESC LIMIT %s OFFSET %s',
+                [self.expression, window.stop - window.start, window.start],
+            )
+            ids = [post_id for post_id, score in cursor.fetchall()]
+        posts = feed().in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import follows, search, timeline
+from .caching import bump_post_feeds
+from .counters import (bump_post_version, change_comment_count,
+                       change_user_counter)
+from .models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    # Пост могли перенести в другое сообщество — его ленту тоже сбросим
+    instance._previous_group_id = None
+    if instance.pk is not None:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        change_user_counter(instance.author_id, 'posts_count', 1)
+        timeline.fan_out(instance)
+    else:
+        bump_post_version(instance.pk)
+    if search.is_available():
+        search.index_post(instance)
+    bump_post_feeds(instance.group_id,
+                    getattr(instance, '_previous_group_id', None),
+                    author_id=instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_user_counter(instance.author_id, 'posts_count', -1)
+    if search.is_available():
+        search.unindex(instance.pk)
+    bump_post_feeds(instance.group_id, author_id=instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if search.is_available():
+        search.index_comment(instance)
+    if created:
+        change_comment_count(instance.post_id, 1)
+        post = instance.post
+        bump_post_feeds(post.group_id, author_id=post.author_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+    if search.is_available():
+        search.unindex(-instance.pk)
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'group_id', 'author_id').first() or {}
+    bump_post_feeds(post.get('group_id'), author_id=post.get('author_id'))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follows.follow_added(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follows.follow_removed(instance.user_id, instance.author_id)
@@ -0,0 +1,44 @@
+from django import template
+from django.conf import settings
+from sorl.thumbnail import default
+
+from .. import pagination
+from ..thumbnails import schedule_thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(post, geometry, **options):
+    """Готовая миниатюра картинки поста или ``None``; если миниатюры ещё
+    нет, её генерация уходит в фоновый пул, а шаблон рисует заглушку.
+    Без фонового пула миниатюра создаётся сразу и возвращается."""
+    if not post.image:
+        return None
+    thumbnail = default.backend.get_ready_thumbnail(
+        post.image, geometry, **options
+    )
+    if thumbnail is None:
+        schedule_thumbnails(post)
+        if not settings.POSTS_THUMBNAIL_ASYNC:
+            thumbnail = default.backend.get_ready_thumbnail(
+                post.image, geometry, **options
+            )
+    return thumbnail
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, number):
+    """Ссылка на страницу ``number`` с сохранением остальных параметров
+    запроса (например, поисковой строки)."""
+    query = context['request'].GET.copy()
+    query['page'] = number
+    return f'?{query.urlencode()}'
+
+
+@register.simple_tag
+def page_window(page, on_each_side=2, on_ends=1):
+    """Окно номеров страниц вокруг текущей (см. ``pagination.page_window``)
+    вместо полного ``paginator.page_range``."""
+    return pagination.page_window(page.number, page.paginator.num_pages,
+                                  on_each_side, on_ends)
@@ -0,0 +1,96 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(title='API', slug='api-group')
+        for number in range(5):
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group if number % 2 else None)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get_json(self, client, url, status=200, **params):
+        response = client.get(url, params)
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(response.content)
+
+    def test_feeds_return_posts(self):
+        """Ленты отдают посты от новых к старым одним запросом к БД."""
+        urls = {
+            reverse('api:posts'): 5,
+            reverse('api:group_posts', args=[self.group.slug]): 2,
+            reverse('api:user_posts', args=[self.author.username]): 5,
+            reverse('api:follow'): 5,
+        }
+        for url, count in urls.items():
+            with self.subTest(url=url):
+                data = self.get_json(self.reader_client, url)
+                ids = [post['id'] for post in data['results']]
+                self.assertEqual(len(ids), count)
+                self.assertEqual(ids, sorted(ids, reverse=True))
+        with self.assertNumQueries(1):
+            data = self.get_json(self.guest_client, reverse('api:posts'))
+        self.assertEqual(
+            set(data['results'][0]),
+            {'id', 'text', 'pub_date', 'author', 'group', 'image',
+             'comment_count'},
+        )
+        self.assertEqual(data['results'][0]['author'], self.author.username)
+
+    def test_cursor_pagination(self):
+        """Курсор ведёт по ленте без повторов и пропусков."""
+        url = reverse('api:posts')
+        seen = []
+        data = self.get_json(self.guest_client, url, limit=2)
+        while True:
+            seen += [post['id'] for post in data['results']]
+            if not data['next_cursor']:
+                break
+            data = self.get_json(self.guest_client, url, limit=2,
+                                 cursor=data['next_cursor'])
+        self.assertEqual(seen, list(Post.objects.order_by(
+            '-pub_date', '-id').values_list('id', flat=True)))
+        self.assertIsNotNone(data['previous_cursor'])
+
+    def test_field_selection(self):
+        """?fields= оставляет в ответе только запрошенные поля."""
+        data = self.get_json(self.guest_client, reverse('api:posts'),
+                             fields='id,group')
+        for post in data['results']:
+            self.assertEqual(set(post), {'id', 'group'})
+        self.assertIn(self.group.slug,
+                      [post['group'] for post in data['results']])
+
+    def test_bad_requests(self):
+        """Неизвестные поля, неверный limit и битый курсор — ошибка 400,
+        лента подписок без входа — 401, несуществующее сообщество — 404."""
+        url = reverse('api:posts')
+        for params in ({'fields': 'id,password'}, {'limit': 0},
+                       {'limit': 'many'}, {'cursor': 'broken'}):
+            with self.subTest(params=params):
+                data = self.get_json(self.guest_client, url, 400, **params)
+                self.assertIn('error', data)
+        self.get_json(self.guest_client, reverse('api:follow'), 401)
+        response = self.guest_client.get(
+            reverse('api:group_posts', args=['missing']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,244 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..counters import recount_user
+from ..models import Comment, Follow, Group, Post, TimelineEntry, UserCounters
+
+User = get_user_model()
+
+
+class ExplainViewsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='explained')
+        cls.group = Group.objects.create(title='Группа', slug='explained')
+        Post.objects.create(text='Пост', author=cls.author, group=cls.group)
+
+    def test_explain_views_prints_plans(self):
+        """explain_views печатает планы запросов всех лент
+        и использует составные индексы."""
+        out = StringIO()
+        call_command('explain_views', stdout=out)
+        output = out.getvalue()
+        for view in ('index', 'group_posts', 'profile', 'post_view',
+                     'follow_index'):
+            with self.subTest(view=view):
+                self.assertIn(f'{view}:', output)
+        self.assertIn('post_author_pub_date', output)
+        self.assertIn('post_group_pub_date', output)
+
+    def test_follow_index_reads_timeline_index(self):
+        """Страница ленты подписок читается по индексу ленты
+        без JOIN и сортировки во временном B-дереве."""
+        reader = User.objects.create_user(username='explained_follower')
+        Follow.objects.create(user=reader, author=self.author)
+        out = StringIO()
+        call_command('explain_views', username=reader.username, stdout=out)
+        output = out.getvalue()
+        follow_plans = output.split('follow_index:')[1].split(':\n')[0]
+        self.assertIn('timeline_user_pub_date', follow_plans)
+        self.assertNotIn('TEMP B-TREE', follow_plans)
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора запрещена базой."""
+        reader = User.objects.create_user(username='explained_reader')
+        Follow.objects.create(user=reader, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=reader, author=self.author)
+
+
+class BenchCommandsTest(TestCase):
+    def test_seed_bench_fills_derived_data(self):
+        """seed_bench создаёт данные и досчитывает счётчики и ленты,
+        которые при обычной записи ведут сигналы."""
+        call_command('seed_bench', users=6, groups=2, posts=40, comments=30,
+                     follows=8, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), 8)
+        self.assertEqual(
+            TimelineEntry.objects.count(),
+            Post.objects.filter(author__following__isnull=False).count(),
+        )
+        for counters in UserCounters.objects.all():
+            expected = recount_user(counters.user_id)
+            with self.subTest(user=counters.user_id):
+                self.assertEqual(
+                    (counters.posts_count, counters.followers_count,
+                     counters.following_count),
+                    (expected.posts_count, expected.followers_count,
+                     expected.following_count),
+                )
+
+    def test_bench_views_reports_every_view(self):
+        """bench_views замеряет все страницы на каждой глубине."""
+        call_command('seed_bench', users=4, groups=1, posts=25, comments=5,
+                     follows=4, stdout=StringIO())
+        out = StringIO()
+        call_command('bench_views', repeat=2, warmup=0, pages='1,3',
+                     json=True, stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(
+            {(row['view'], row['page']) for row in results},
+            {(view, page) for view in ('index', 'group_posts', 'profile',
+                                       'follow_index') for page in (1, 3)}
+            | {('post_view', None)},
+        )
+        for row in results:
+            with self.subTest(view=row['view'], page=row['page']):
+                self.assertGreater(row['queries'], 0)
+                self.assertLessEqual(row['p50'], row['max'])
+
+
+class ImportPostsCommandTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_import_resolves_references(self):
+        """import_posts загружает JSONL и CSV, связывает записи
+        по username, slug и id поста из файла и пропускает битые."""
+        User.objects.create_user(username='old_author')
+        users = self.write('users.csv', 'username,email\n'
+                                        'importer,i@example.com\n'
+                                        'old_author,\n')
+        groups = self.write('groups.jsonl',
+                            '{"slug": "imported", "title": "Группа"}\n')
+        rows = [
+            {'id': 'a', 'author': 'importer', 'group': 'imported',
+             'text': 'Первый', 'pub_date': '2020-01-02T03:04:05'},
+            {'id': 'b', 'author': 'old_author', 'text': 'Второй'},
+            {'id': 'c', 'author': 'nobody', 'text': 'Без автора'},
+        ]
+        posts = self.write('posts.jsonl',
+                           '\n'.join(json.dumps(row) for row in rows))
+        comments = self.write('comments.csv', 'post,author,text\n'
+                                              'b,importer,Ответ\n'
+                                              'c,importer,Некуда\n')
+        follows = self.write('follows.csv', 'user,author\n'
+                                            'importer,old_author\n'
+                                            'importer,importer\n')
+        out = StringIO()
+        call_command('import_posts', users=users, groups=groups, posts=posts,
+                     comments=comments, follows=follows, batch_size=1,
+                     stdout=out)
+
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.author.username, 'importer')
+        self.assertEqual(first.group.slug, 'imported')
+        self.assertEqual(first.pub_date.year, 2020)
+        self.assertEqual(first.comment_count, 0)
+        second = Post.objects.get(text='Второй')
+        self.assertEqual(second.comments.get().text, 'Ответ')
+        self.assertEqual(second.comment_count, 1)
+        self.assertFalse(Post.objects.filter(text='Без автора').exists())
+        importer = User.objects.get(username='importer')
+        self.assertEqual(importer.counters.posts_count, 1)
+        self.assertEqual(importer.counters.following_count, 1)
+        self.assertTrue(importer.timeline.filter(post=second).exists())
+        self.assertIn('строк/с', out.getvalue())
+        self.assertIn('posts: 2', out.getvalue())
+
+    def test_aborted_import_rebuilds_derived_data(self):
+        """Если загрузка оборвалась на битой записи, счётчики и ленты
+        всё равно пересчитаны для уже закоммиченных пачек."""
+        author = User.objects.create_user(username='aborted_author')
+        reader = User.objects.create_user(username='aborted_reader')
+        Follow.objects.create(user=reader, author=author)
+        rows = [
+            {'author': 'aborted_author', 'text': 'Успел'},
+            {'author': 'aborted_author', 'text': 'Битый',
+             'pub_date': 'вчера'},
+        ]
+        posts = self.write('aborted.jsonl',
+                           '\n'.join(json.dumps(row) for row in rows))
+        with self.assertRaisesMessage(CommandError, 'ошибка в записи'):
+            call_command('import_posts', posts=posts, batch_size=1,
+                         stdout=StringIO())
+        post = Post.objects.get(author=author)
+        self.assertEqual(post.text, 'Успел')
+        self.assertEqual(UserCounters.objects.get(user=author).posts_count, 1)
+        self.assertTrue(reader.timeline.filter(post=post).exists())
+
+
+class ExportContentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='exported')
+        cls.other = User.objects.create_user(username='not_exported')
+        cls.group = Group.objects.create(title='Группа', slug='exported')
+        cls.post = Post.objects.create(text='Пост, с запятой',
+                                       author=cls.author, group=cls.group)
+        Post.objects.create(text='Чужой пост', author=cls.other)
+        Comment.objects.create(post=cls.post, author=cls.other,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.other, author=cls.author)
+
+    def export(self, *args, **options):
+        out = StringIO()
+        call_command('export_content', *args, stdout=out, **options)
+        return out.getvalue()
+
+    def test_export_filters_and_formats(self):
+        """export_content выгружает JSONL и CSV с фильтром по автору."""
+        lines = self.export('posts', author='exported').splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record['group'], 'exported')
+        self.assertEqual(record['text'], 'Пост, с запятой')
+        self.assertEqual(
+            self.export('comments', group='exported', format='csv'),
+            f'post,author,text,created\r\n{self.post.pk},not_exported,'
+            f'Комментарий,{self.post.comments.get().created.isoformat()}\r\n',
+        )
+        self.assertEqual(self.export('posts', since='2000-01-01',
+                                     until='2000-01-02'), '')
+
+    def test_export_round_trips_through_import(self):
+        """Выгрузку можно загрузить обратно через import_posts."""
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {}
+            for kind in ('posts', 'comments'):
+                paths[kind] = os.path.join(directory, f'{kind}.csv')
+                self.export(kind, format='csv', output=paths[kind])
+            Post.objects.all().delete()
+            call_command('import_posts', stdout=StringIO(), **paths)
+        post = Post.objects.get(author=self.author)
+        self.assertEqual(post.text, self.post.text)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.comments.get().text, 'Комментарий')
+
+    def test_streaming_endpoint_is_staff_only(self):
+        """Потоковая выгрузка доступна только персоналу."""
+        url = reverse('export_content', kwargs={'kind': 'follows'})
+        client = Client()
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(User.objects.create_user(username='exporter',
+                                                    is_staff=True))
+        response = client.get(url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            'user,author\r\nnot_exported,exported\r\n',
+        )
+        posts_url = reverse('export_content', kwargs={'kind': 'posts'})
+        self.assertEqual(
+            client.get(posts_url, {'since': 'вчера'}).status_code, 400)
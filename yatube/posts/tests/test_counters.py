@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counted_author')
+        cls.reader = User.objects.create_user(username='counted_reader')
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении постов,
+        комментариев и подписок."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Post.objects.create(text='Ещё пост', author=self.author)
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Комментарий')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+
+        counters = UserCounters.objects.get(user=self.author)
+        self.assertEqual(counters.posts_count, 2)
+        self.assertEqual(counters.followers_count, 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.reader).following_count, 1
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.delete()
+        counters.refresh_from_db()
+        self.assertEqual(counters.posts_count, 1)
+        self.assertEqual(counters.followers_count, 0)
+
+    def test_rebuild_counters_command(self):
+        """Команда rebuild_counters исправляет разъехавшиеся счётчики."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Раз')
+        Post.objects.update(comment_count=42)
+        UserCounters.objects.update(posts_count=42)
+
+        call_command('rebuild_counters', stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).posts_count, 1
+        )
+
+    def test_profile_reads_counters(self):
+        """Профиль берёт числа из счётчиков, а не из COUNT-запросов."""
+        Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounters.objects.filter(user=self.author).update(posts_count=7)
+        response = Client().get(
+            reverse('profile', kwargs={'username': self.author.username})
+        )
+        self.assertEqual(response.context['posts_count'], 7)
+        self.assertEqual(response.context['follower_count'], 1)
+        self.assertEqual(response.context['following_count'], 0)
+
+    def test_user_delete_keeps_counters_consistent(self):
+        """Удаление пользователя уменьшает счётчики его авторов."""
+        follower = User.objects.create_user(username='leaving_follower')
+        Follow.objects.create(user=follower, author=self.author)
+        follower.delete()
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).followers_count, 0
+        )
+        self.assertFalse(
+            UserCounters.objects.filter(user_id=follower.pk).exists()
+        )
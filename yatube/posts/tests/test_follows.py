@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from .. import follows
+from ..caching import author_feed_name, feed_version
+from ..models import Follow
+
+User = get_user_model()
+
+
+@override_settings(CORE_CACHE_SHARED=True)
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='graph_reader')
+        cls.author = User.objects.create_user(username='graph_author')
+        cls.other = User.objects.create_user(username='graph_other')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sets_are_cached_and_invalidated(self):
+        """Множества читаются из кэша без запросов и сбрасываются
+        при подписке и отписке."""
+        self.assertEqual(follows.following(self.reader), frozenset())
+        with self.assertNumQueries(0):
+            self.assertFalse(follows.is_following(self.reader, self.author))
+
+        follows.follow(self.reader.pk, self.author.pk)
+        self.assertTrue(follows.is_following(self.reader, self.author))
+        self.assertEqual(follows.followers(self.author), {self.reader.pk})
+
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertFalse(follows.is_following(self.reader, self.author))
+        self.assertEqual(follows.followers(self.author), frozenset())
+
+    @override_settings(CORE_CACHE_SHARED=False)
+    def test_local_cache_reads_database(self):
+        """Без общего кэша множества читаются из базы: подписку, сделанную
+        в другом воркере, видно сразу."""
+        self.assertFalse(follows.is_following(self.reader, self.author))
+        # bulk_create минует сигналы — как запись чужим процессом
+        Follow.objects.bulk_create([Follow(user=self.reader,
+                                           author=self.author)])
+        self.assertTrue(follows.is_following(self.reader, self.author))
+
+    def test_mutuals(self):
+        """Взаимные подписки — пересечение подписчиков и подписок."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        Follow.objects.create(user=self.reader, author=self.other)
+        self.assertEqual(follows.mutuals(self.reader), {self.author.pk})
+
+    def test_profile_shows_own_follow_state(self):
+        """Профиль показывает подписку именно на этого автора:
+        подписка на другого автора не в счёт."""
+        Follow.objects.create(user=self.reader, author=self.other)
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('profile', args=[self.author.username])
+        self.assertFalse(client.get(url).context['following'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(client.get(url).context['following'])
+
+
+class FollowCommitTest(TransactionTestCase):
+    """Версии лент меняются в ``on_commit``, а его обычный ``TestCase``
+    не вызывает."""
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='commit_reader')
+        self.author = User.objects.create_user(username='commit_author')
+
+    def test_profile_versions_change_after_commit(self):
+        """До коммита версии профилей прежние: читатель не закэширует
+        под новой версией страницу без подписки."""
+        feeds = [author_feed_name(user.username)
+                 for user in (self.reader, self.author)]
+        versions = [feed_version(feed) for feed in feeds]
+        with transaction.atomic():
+            follows.follow(self.reader.pk, self.author.pk)
+            self.assertEqual([feed_version(feed) for feed in feeds],
+                             versions)
+        for feed, version in zip(feeds, versions):
+            self.assertNotEqual(feed_version(feed), version)
+
+    @override_settings(CORE_CACHE_SHARED=True)
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет ETag профиля: счётчик и кнопка другие."""
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('profile', args=[self.author.username])
+        client.get(url)
+        etag = client.get(url)['ETag']
+        self.assertEqual(
+            client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        client.post(reverse('profile_follow', args=[self.author.username]))
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
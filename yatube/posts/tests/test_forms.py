@@ -1,3 +1,4 @@
+import io
 import shutil
 import tempfile
 
@@ -6,7 +7,9 @@ from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from ..forms import PostForm
 from ..models import Group, Post
 
 User = get_user_model()
@@ -14,7 +17,7 @@ User = get_user_model()
 MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, POSTS_THUMBNAIL_ASYNC=False)
 class PostFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -181,3 +184,66 @@ class PostFormTests(TestCase):
         self.assertEqual(test_post.group, self.test_group)
         self.assertEqual(test_post.author, self.test_user)
         self.assertEqual(response.status_code, 200)
+
+
+def make_image(size, image_format, name, **save_options):
+    content = io.BytesIO()
+    Image.new('RGB', size, 'red').save(content, image_format, **save_options)
+    return SimpleUploadedFile(name, content.getvalue())
+
+
+@override_settings(POSTS_IMAGE_MAX_SIDE=100, POSTS_IMAGE_MAX_PIXELS=10 ** 6)
+class PostFormImageTests(TestCase):
+    def bound_form(self, image):
+        return PostForm(data={'text': 'Пост с картинкой'},
+                        files={'image': image})
+
+    def stored_image(self, form):
+        self.assertTrue(form.is_valid(), form.errors)
+        return Image.open(form.cleaned_data['image'])
+
+    def test_too_many_pixels_rejected(self):
+        """Картинка с огромными размерами отклоняется по заголовку."""
+        form = self.bound_form(make_image((2000, 1000), 'PNG', 'big.png'))
+        self.assertFalse(form.is_valid())
+        self.assertTrue(form.has_error('image', 'too_many_pixels'))
+
+    def test_large_image_downscaled(self):
+        """Большая картинка уменьшается до POSTS_IMAGE_MAX_SIDE."""
+        form = self.bound_form(make_image((400, 200), 'PNG', 'wide.png'))
+        image = self.stored_image(form)
+        self.assertEqual(image.size, (100, 50))
+        self.assertEqual(form.cleaned_data['image'].name, 'wide.png')
+
+    def test_metadata_stripped(self):
+        """EXIF не попадает в сохранённый JPEG."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        form = self.bound_form(
+            make_image((50, 50), 'JPEG', 'photo.jpg', exif=exif)
+        )
+        self.assertNotIn('exif', self.stored_image(form).info)
+
+    def test_non_web_format_converted(self):
+        """BMP перекодируется в JPEG."""
+        form = self.bound_form(make_image((50, 50), 'BMP', 'scan.bmp'))
+        self.assertEqual(self.stored_image(form).format, 'JPEG')
+        self.assertEqual(form.cleaned_data['image'].name, 'scan.jpg')
+
+    def test_truncated_image_rejected(self):
+        """Обрезанный JPEG — ошибка формы, а не 500."""
+        image = make_image((300, 300), 'JPEG', 'cut.jpg')
+        truncated = SimpleUploadedFile('cut.jpg', image.read()[:2000])
+        form = self.bound_form(truncated)
+        self.assertFalse(form.is_valid())
+        self.assertTrue(form.has_error('image', 'invalid_image'))
+
+        client = Client()
+        client.force_login(User.objects.create_user(username='cut_author'))
+        truncated.seek(0)
+        response = client.post(reverse('new_post'),
+                               {'text': 'Битая картинка', 'image': truncated})
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response, 'form', 'image',
+                             'Не удалось прочитать картинку: файл повреждён.')
+        self.assertFalse(Post.objects.filter(text='Битая картинка').exists())
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post
+from ..pagination import CursorPage, CursorPaginator, page_window
+
+User = get_user_model()
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor_user')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {count}', author=cls.user)
+            for count in range(25)
+        )
+        # Половина постов с одинаковой датой: порядок держится на id
+        same_date = timezone.now()
+        Post.objects.filter(
+            id__in=Post.objects.values_list('id', flat=True)[:12]
+        ).update(pub_date=same_date)
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def test_pages_walk_forward_and_back(self):
+        """Курсоры «вперёд» и «назад» проходят ленту без пропусков."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        walked = [post for page in pages for post in page]
+        self.assertEqual(walked, self.expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertFalse(pages[0].has_previous())
+
+        back = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        back = paginator.page(back.previous_cursor)
+        self.assertEqual(list(back), list(pages[0]))
+        self.assertFalse(back.has_previous())
+
+    def test_page_does_not_count(self):
+        """Страница по курсору — один запрос, без COUNT(*)."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.page(cursor)
+        self.assertEqual(list(page), self.expected[10:20])
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        for cursor in ('garbage', 'WyJ4IixbXV0', '!!!'):
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(list(page), self.expected[:10])
+
+    def test_views_accept_cursor(self):
+        """Ленты переключаются в keyset-режим по параметру cursor."""
+        client = Client()
+        client.force_login(self.user)
+        urls = (
+            reverse('index'),
+            reverse('profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = client.get(url, {'cursor': ''})
+                page = response.context['page']
+                self.assertIsInstance(page, CursorPage)
+                self.assertEqual(list(page), self.expected[:10])
+                response = client.get(url, {'cursor': page.next_cursor})
+                self.assertEqual(list(response.context['page']),
+                                 self.expected[10:20])
+                self.assertContains(response, '?cursor=')
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_mode_setting(self):
+        """Настройка POSTS_PAGINATION включает keyset-режим по умолчанию."""
+        response = Client().get(reverse('index'))
+        self.assertIsInstance(response.context['page'], CursorPage)
+
+
+class PageWindowTest(TestCase):
+    def test_window(self):
+        """Окно: края, текущая ±2 и пропуски вместо остальных страниц."""
+        cases = {
+            (1, 5): [1, 2, 3, 4, 5],
+            (1, 100): [1, 2, 3, None, 100],
+            (50, 100): [1, None, 48, 49, 50, 51, 52, None, 100],
+            (99, 100): [1, None, 97, 98, 99, 100],
+            (4, 100): [1, 2, 3, 4, 5, 6, None, 100],
+        }
+        for (number, num_pages), expected in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_window_size_is_constant(self):
+        """Длина окна не растёт с числом страниц."""
+        for num_pages in (10, 1000, 100000):
+            self.assertLessEqual(
+                len(page_window(num_pages // 2, num_pages)), 9)
+
+    @override_settings(POSTS_PER_PAGE=1)
+    def test_paginator_markup(self):
+        """Навигация ленты выводит окно страниц, а не все страницы."""
+        user = User.objects.create_user(username='window_user')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {count}', author=user) for count in range(40)
+        )
+        response = Client().get(reverse('index'), {'page': 20})
+        self.assertContains(response, '?page=1"')
+        self.assertContains(response, '?page=40"')
+        self.assertContains(response, '?page=22"')
+        self.assertNotContains(response, '?page=10"')
+        self.assertContains(response, '&hellip;', count=2)
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..search import SearchResults, match_expression
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='searcher')
+        cls.title_post = Post.objects.create(
+            text='Ежик в тумане', author=cls.author)
+        cls.comment_post = Post.objects.create(
+            text='Просто пост', author=cls.author)
+        Comment.objects.create(post=cls.comment_post, author=cls.author,
+                               text='Тут тоже про ежика')
+
+    def found(self, query):
+        results = SearchResults(query)
+        return results[0:results.count()]
+
+    def test_match_expression_is_safe(self):
+        """Спецсимволы FTS5 из запроса не попадают в MATCH."""
+        self.assertEqual(match_expression('ёж" OR (NEAR'),
+                         '"ёж" "or" "near"*')
+        self.assertIsNone(match_expression('"*)'))
+        self.assertEqual(self.found('"*)'), [])
+
+    def test_posts_ranked_by_text_then_comments(self):
+        """Находятся посты по тексту и по комментариям, совпадение
+        в тексте поста выше; префикс последнего слова работает."""
+        self.assertEqual(self.found('ежик'),
+                         [self.title_post, self.comment_post])
+        self.assertEqual(self.found('тума'), [self.title_post])
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при правке и удалении постов
+        и комментариев."""
+        post = Post.objects.get(pk=self.title_post.pk)
+        post.text = 'Медвежонок'
+        post.save()
+        self.assertEqual(self.found('ежик'), [self.comment_post])
+        self.comment_post.comments.all().delete()
+        self.assertEqual(self.found('ежик'), [])
+        Post.objects.filter(pk=self.comment_post.pk).delete()
+        self.assertEqual(self.found('пост'), [])
+
+    def test_rebuild_search_command(self):
+        """rebuild_search восстанавливает индекс из таблиц."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        call_command('rebuild_search', stdout=StringIO())
+        self.assertEqual(self.found('ежик'),
+                         [self.title_post, self.comment_post])
+
+    def test_search_page(self):
+        """Страница поиска выводит результаты и хранит запрос
+        в ссылках паджинатора."""
+        for number in range(12):
+            Post.objects.create(text=f'Туман номер {number}',
+                                author=self.author)
+        response = Client().get(reverse('search'), {'q': 'туман'})
+        page = response.context['page']
+        self.assertEqual(page.paginator.count, 13)
+        self.assertEqual(len(page), 10)
+        self.assertContains(response, '?q=%D1%82%D1%83%D0%BC%D0%B0%D0%BD'
+                                      '&amp;page=2')
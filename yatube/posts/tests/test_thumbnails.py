@@ -0,0 +1,99 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+
+from ..models import Post
+from ..thumbnails import POST_THUMBNAILS
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='picture.png', size=(40, 20)):
+    content = io.BytesIO()
+    Image.new('RGB', size, 'red').save(content, format='PNG')
+    return SimpleUploadedFile(name, content.getvalue(),
+                              content_type='image/png')
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, function, *args):
+        self.calls.append((function, args))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, POSTS_THUMBNAIL_ASYNC=False)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='thumbnail_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def is_ready(self, post):
+        geometry, options = POST_THUMBNAILS[0]
+        return default.backend.get_ready_thumbnail(
+            post.image, geometry, **dict(options)
+        ) is not None
+
+    def test_upload_generates_thumbnails(self):
+        """Миниатюры создаются при загрузке, а не при первом показе."""
+        self.client.post(reverse('new_post'),
+                         {'text': 'С картинкой', 'image': make_image()})
+        post = Post.objects.get(text='С картинкой')
+        self.assertTrue(self.is_ready(post))
+        self.assertContains(self.client.get(reverse('index')),
+                            'class="card-img" src=')
+
+    def test_sync_mode_renders_missing_thumbnail(self):
+        """Без фонового пула недостающая миниатюра создаётся при показе
+        и сразу попадает на страницу вместо заглушки."""
+        post = Post.objects.create(text='Без миниатюры', author=self.author,
+                                   image=make_image('missing.png'))
+        self.assertFalse(self.is_ready(post))
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'class="card-img" src=')
+        self.assertNotContains(response, 'card-img bg-light')
+        self.assertTrue(self.is_ready(post))
+
+    @override_settings(POSTS_THUMBNAIL_ASYNC=True)
+    def test_async_upload_shows_placeholder_until_ready(self):
+        """В фоновом режиме до готовности миниатюры видна заглушка."""
+        executor = FakeExecutor()
+        with mock.patch('posts.thumbnails._get_executor',
+                        return_value=executor):
+            self.client.post(reverse('new_post'),
+                             {'text': 'В очереди', 'image': make_image()})
+            post = Post.objects.get(text='В очереди')
+            self.assertFalse(self.is_ready(post))
+            response = self.client.get(reverse('index'))
+        self.assertContains(response, 'card-img bg-light')
+        self.assertEqual(len(executor.calls), 1)
+
+        function, args = executor.calls[0]
+        function(*args)
+        self.assertTrue(self.is_ready(post))
+        response = self.client.get(reverse('index'))
+        self.assertNotContains(response, 'card-img bg-light')
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='timeline_reader')
+        cls.author = User.objects.create_user(username='timeline_author')
+        cls.other = User.objects.create_user(username='timeline_other')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в материализованные ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author_client.post(reverse('new_post'), {'text': 'Свежий'})
+        post = Post.objects.get(text='Свежий')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post, pub_date=post.pub_date
+        ).exists())
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.other
+        ).exists())
+        response = self.reader_client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']), [post])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        """Подписка дозаполняет ленту, отписка очищает её от автора."""
+        posts = [Post.objects.create(text=f'Пост {count}', author=self.author)
+                 for count in range(3)]
+        Post.objects.create(text='Чужой', author=self.other)
+        self.reader_client.get(
+            reverse('profile_follow', args=[self.author.username])
+        )
+        response = self.reader_client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']), posts[::-1])
+
+        self.reader_client.get(
+            reverse('profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+
+    @override_settings(POSTS_TIMELINE_LENGTH=3)
+    def test_timeline_is_trimmed(self):
+        """Лента не растёт дальше POSTS_TIMELINE_LENGTH записей."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(text=f'Пост {count}', author=self.author)
+                 for count in range(5)]
+        entries = TimelineEntry.objects.filter(user=self.reader)
+        self.assertEqual(
+            set(entries.values_list('post_id', flat=True)),
+            {post.pk for post in posts[-3:]}
+        )
+
+    @override_settings(POSTS_PER_PAGE=2)
+    def test_cursor_pages_follow_timeline_order(self):
+        """Курсорные страницы ленты подписок идут в порядке постов,
+        посты с одной датой различает id."""
+        posts = [Post.objects.create(text=f'Пост {count}', author=self.author)
+                 for count in range(5)]
+        Post.objects.filter(pk__in=[post.pk for post in posts[:3]]).update(
+            pub_date=posts[0].pub_date)
+        Follow.objects.create(user=self.reader, author=self.author)
+        expected = list(Post.objects.filter(author=self.author)
+                        .order_by('-pub_date', '-id'))
+        seen = []
+        url = reverse('follow_index') + '?cursor='
+        while url:
+            page = self.reader_client.get(url).context['page']
+            seen += list(page)
+            url = (reverse('follow_index') + f'?cursor={page.next_cursor}'
+                   if page.has_next() else None)
+        self.assertEqual(seen, expected)
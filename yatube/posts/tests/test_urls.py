@@ -1,7 +1,7 @@
 # posts/tests/tests_url.py
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
-from django.urls import reverse
+from django.urls import resolve, reverse
 
 from ..models import Group, Post
 
@@ -90,3 +90,34 @@ class PostsURLTests(TestCase):
             with self.subTest():
                 response = self.authorized_client.get(reverse_name)
                 self.assertTemplateUsed(response, template)
+
+
+class ServiceUrlsTest(TestCase):
+    def assert_profile_routes(self, username):
+        routes = {
+            reverse('profile', args=[username]): 'profile',
+            reverse('profile_follow', args=[username]): 'profile_follow',
+            reverse('profile_unfollow', args=[username]): 'profile_unfollow',
+            reverse('post', args=[username, 5]): 'post',
+            reverse('post_edit', args=[username, 5]): 'post_edit',
+        }
+        for url, name in routes.items():
+            with self.subTest(url=url):
+                self.assertEqual(resolve(url).url_name, name)
+
+    def test_export_does_not_shadow_profiles(self):
+        """Выгрузка не перекрывает страницы автора с именем export."""
+        self.assert_profile_routes('export')
+        self.assertEqual(
+            resolve(reverse('export_content', args=['posts'])).url_name,
+            'export_content')
+
+    def test_api_does_not_shadow_profiles(self):
+        """API не перекрывает страницы автора с именем api."""
+        self.assert_profile_routes('api')
+        self.assertEqual(resolve(reverse('api:follow')).url_name, 'follow')
+
+    def test_search_does_not_shadow_profiles(self):
+        """Поиск не перекрывает страницы автора с именем search."""
+        self.assert_profile_routes('search')
+        self.assertEqual(resolve(reverse('search')).url_name, 'search')
@@ -5,16 +5,18 @@ import time
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django import forms
 
-from ..models import Post, Group, Follow, Comment
+from ..models import Post, Group, Follow, Comment, UserCounters
 
 User = get_user_model()
 
 
+@override_settings(POSTS_THUMBNAIL_ASYNC=False)
 class PostsPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -64,6 +66,7 @@ class PostsPagesTests(TestCase):
         super().tearDownClass()
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -239,6 +242,52 @@ class FollowTest(TestCase):
         self.assertFalse(Follow.objects.filter(
             user=FollowTest.follower, author=FollowTest.author_2).exists())
 
+    def test_follow_is_idempotent(self):
+        """Повторные подписка и отписка не плодят строк
+        и не сбивают счётчики."""
+        url = reverse('profile_follow', args=[FollowTest.author_2.username])
+        for _ in range(2):
+            self.authorized_client_1.get(url)
+        self.assertEqual(Follow.objects.filter(
+            user=FollowTest.follower, author=FollowTest.author_2).count(), 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=FollowTest.author_2)
+            .followers_count, 1)
+        url = reverse('profile_unfollow', args=[FollowTest.author_2.username])
+        for _ in range(2):
+            self.authorized_client_1.get(url)
+        self.assertEqual(
+            UserCounters.objects.get(user=FollowTest.author_2)
+            .followers_count, 0)
+
+    def test_follow_ajax_returns_follower_count(self):
+        """AJAX-подписка отвечает JSON с новым числом подписчиков."""
+        response = self.authorized_client_1.post(
+            reverse('profile_follow', args=[FollowTest.author_2.username]),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.json(),
+                         {'following': True, 'follower_count': 1})
+        response = self.authorized_client_1.post(
+            reverse('profile_unfollow', args=[FollowTest.author_2.username]),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.json(),
+                         {'following': False, 'follower_count': 0})
+
+    def test_guest_gets_login_link_instead_of_follow(self):
+        """Гость видит ссылку на вход вместо AJAX-кнопок, а AJAX-подписка
+        гостя получает 401, а не страницу входа после редиректа."""
+        url = reverse('profile_follow', args=[FollowTest.author_2.username])
+        response = Client().get(
+            reverse('profile', args=[FollowTest.author_2.username]))
+        self.assertNotContains(response, url)
+        self.assertContains(response, reverse('login') + '?next=')
+        response = Client().post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'error': 'нужно войти'})
+        self.assertEqual(Client().post(url).status_code, 302)
+
     def new_post_appears_tape_follower(self):
         """Новая запись пользователя появляется в ленте тех,
         кто на него подписан."""
@@ -299,3 +348,303 @@ class CommentTest(TestCase):
         self.assertTrue(
             Comment.objects.get(post='Тестовый комментарий').author,
             CommentTest.comment.author)
+
+
+@override_settings(POSTS_COMMENTS_PER_PAGE=5)
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='commented')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        for number in range(12):
+            commenter = User.objects.create(username=f'commenter_{number}')
+            Comment.objects.create(post=cls.post, author=commenter,
+                                   text=f'Комментарий {number}')
+
+    def test_post_view_renders_first_comments(self):
+        """Страница поста выводит только первую порцию комментариев,
+        число запросов не зависит от их количества."""
+        url = reverse('post', args=[self.author.username, self.post.id])
+        cache.clear()
+        client = Client()
+        client.get(url)
+        # Пост с автором и группой, комментарии с авторами, счётчики
+        with self.assertNumQueries(3):
+            response = client.get(url)
+        comments = response.context['comments']
+        self.assertEqual([comment.text for comment in comments],
+                         [f'Комментарий {number}' for number in range(5)])
+        self.assertContains(response, f'?comments={comments.next_cursor}')
+
+    def test_load_more_endpoint(self):
+        """JSON-эндпоинт отдаёт следующие порции до конца."""
+        url = reverse('post_comments',
+                      args=[self.author.username, self.post.id])
+        texts, cursor = [], ''
+        for _ in range(3):
+            data = Client().get(url, {'comments': cursor}).json()
+            texts += [comment['text'] for comment in data['comments']]
+            cursor = data['next_cursor']
+        self.assertIsNone(cursor)
+        self.assertEqual(texts,
+                         [f'Комментарий {number}' for number in range(12)])
+        self.assertEqual(data['comments'][0]['author'], 'commenter_10')
+        self.assertEqual(
+            Client().get(reverse('post_comments',
+                                 args=['commenter_1', self.post.id]))
+            .status_code, 404)
+
+
+class FeedQueryBudgetTest(TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(title='Бюджет', slug='budget')
+        cls.reader = User.objects.create_user(username='budget_reader')
+        for count in range(12):
+            author = User.objects.create_user(username=f'budget_{count}')
+            Follow.objects.create(user=cls.reader, author=author)
+            post = Post.objects.create(text=f'Пост {count}', author=author,
+                                       group=cls.group)
+            Comment.objects.create(post=post, author=cls.reader,
+                                   text='Комментарий')
+        cls.author = author
+        for count in range(10):
+            Post.objects.create(text=f'Ещё пост {count}', author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_feed_query_budget(self):
+        """Ленты укладываются в фиксированный бюджет запросов."""
+        budgets = (
+            # COUNT + страница
+            (self.guest_client, reverse('index'), 2),
+            # сообщество + COUNT + страница
+            (self.guest_client,
+             reverse('posts', kwargs={'slug': self.group.slug}), 3),
+            # автор + COUNT + счётчики + страница
+            (self.guest_client,
+             reverse('profile', kwargs={'username': self.author.username}),
+             4),
+            # сессия + пользователь + COUNT + записи ленты + посты по id
+            (self.authorized_client, reverse('follow_index'), 5),
+        )
+        for client, url, queries in budgets:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(len(response.context['page']), 10)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='card_author')
+        cls.reader = User.objects.create_user(username='card_reader')
+        cls.post = Post.objects.create(text='Исходный текст',
+                                       author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_card_is_served_from_cache(self):
+        """Общая часть карточки берётся из кэша, пока версия не менялась,
+        а кнопки рисуются для каждого пользователя."""
+        self.author_client.get(reverse('index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        response = self.author_client.get(reverse('index'))
+        self.assertContains(response, 'Исходный текст')
+        self.assertContains(response, 'Редактировать')
+
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        response = reader_client.get(reverse('index'))
+        self.assertContains(response, 'Исходный текст')
+        self.assertNotContains(response, 'Редактировать')
+
+    def test_edit_and_comment_bump_version(self):
+        """Редактирование и комментарий меняют версию карточки."""
+        self.author_client.get(reverse('index'))
+        self.author_client.post(
+            reverse('post_edit', args=[self.author.username, self.post.id]),
+            {'text': 'Новый текст'}
+        )
+        response = self.author_client.get(reverse('index'))
+        self.assertContains(response, 'Новый текст')
+
+        version = Post.objects.get(pk=self.post.pk).version
+        self.author_client.post(
+            reverse('add_comment', args=[self.author.username, self.post.id]),
+            {'text': 'Комментарий'}
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).version,
+                         version + 1)
+
+
+@override_settings(CORE_CACHE_SHARED=True)
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='page_cache_author')
+        cls.group = Group.objects.create(title='Кэш', slug='page-cache')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.group_url = reverse('posts', kwargs={'slug': self.group.slug})
+
+    def test_anonymous_pages_skip_database(self):
+        """Повторный анонимный запрос отдаётся из кэша без запросов к БД."""
+        for url in (reverse('index'), self.group_url):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+                self.assertEqual(
+                    self.guest_client.get(url, {'page': 2}).status_code, 200
+                )
+
+    @override_settings(CORE_CACHE_SHARED=False)
+    def test_local_cache_does_not_keep_pages(self):
+        """Без общего кэша страницы не кэшируются: сброс версии в одном
+        воркере не дошёл бы до остальных."""
+        self.guest_client.get(reverse('index'))
+        response = self.guest_client.get(reverse('index'))
+        self.assertIsNotNone(response.context)
+
+    def test_authorized_pages_are_not_cached(self):
+        """Авторизованным страница рисуется заново."""
+        self.author_client.get(reverse('index'))
+        response = self.author_client.get(reverse('index'))
+        self.assertIsNotNone(response.context)
+
+    def test_writes_invalidate_feeds(self):
+        """Новый пост, правка и комментарий сбрасывают кэш лент."""
+        self.guest_client.get(reverse('index'))
+        self.guest_client.get(self.group_url)
+        self.author_client.post(reverse('new_post'),
+                                {'text': 'Второй пост',
+                                 'group': self.group.id})
+        for url in (reverse('index'), self.group_url):
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Второй пост')
+
+        self.author_client.post(
+            reverse('post_edit', args=[self.author.username, self.post.id]),
+            {'text': 'Первый пост без группы'}
+        )
+        self.assertNotContains(self.guest_client.get(self.group_url),
+                               'Первый пост')
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            'Первый пост без группы')
+
+        self.author_client.post(
+            reverse('add_comment', args=[self.author.username, self.post.id]),
+            {'text': 'Комментарий'}
+        )
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            'Комментариев: 1')
+
+
+@override_settings(CORE_CACHE_SHARED=True)
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='etag_author')
+        cls.reader = User.objects.create_user(username='etag_reader')
+        cls.group = Group.objects.create(title='ETag', slug='etag-group')
+        cls.post = Post.objects.create(text='Пост с ETag', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('index'),
+            reverse('posts', args=[self.group.slug]),
+            reverse('profile', args=[self.author.username]),
+            reverse('post', args=[self.author.username, self.post.id]),
+        )
+
+    def revalidate(self, client, url):
+        # Первая страница с формой выдаёт CSRF-cookie, а с ним и новый ETag
+        client.get(url)
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_answer_304(self):
+        """Страница без изменений отвечает 304 с тем же ETag
+        и без запросов к базе для анонимного читателя."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                etag = self.guest_client.get(url)['ETag']
+                self.assertTrue(etag.startswith('W/'))
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(
+                    self.revalidate(self.reader_client, url).status_code, 304)
+
+    def test_etag_depends_on_reader(self):
+        """Гостю и читателю достаются разные ETag: страницы у них разные."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.reader_client.get(url,
+                                                  HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(CORE_CACHE_SHARED=False)
+    def test_local_cache_sends_no_etag(self):
+        """Без общего кэша ETag не отдаётся: версия ленты, сменённая
+        в одном воркере, не дошла бы до остальных."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertFalse(
+                    self.guest_client.get(url).has_header('ETag'))
+
+    def test_relogin_changes_etag(self):
+        """После повторного входа CSRF-секрет новый, и 304 не отдаёт
+        страницу с формами под старым токеном."""
+        url = reverse('post', args=[self.author.username, self.post.id])
+        self.reader_client.get(url)
+        etag = self.reader_client.get(url)['ETag']
+        self.reader_client.logout()
+        self.reader_client.force_login(self.reader)
+        self.reader_client.cookies['csrftoken'] = 'x' * 32
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_etag(self):
+        """Комментарий меняет ETag всех страниц с постом."""
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in self.urls}
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Свежий комментарий')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
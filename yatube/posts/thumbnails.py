@@ -0,0 +1,92 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from .caching import bump_post_feeds
+from .counters import bump_post_version
+
+logger = logging.getLogger(__name__)
+
+# Все размеры, в которых картинки постов выводятся в шаблонах
+POST_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl.thumbnail, который умеет отдавать миниатюру только
+    если она уже готова, не генерируя её в запросе."""
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def generate_thumbnails(post_id, image_name, group_id=None, author_id=None):
+    for geometry, options in POST_THUMBNAILS:
+        default.backend.get_thumbnail(image_name, geometry, **options)
+    # Карточка и страницы лент с заглушкой больше не актуальны
+    bump_post_version(post_id)
+    bump_post_feeds(group_id, author_id=author_id)
+
+
+def _generate_in_worker(post_id, *args):
+    try:
+        generate_thumbnails(post_id, *args)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры поста %s', post_id)
+    finally:
+        with _lock:
+            _pending.discard(post_id)
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POSTS_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def schedule_thumbnails(post):
+    """Ставит генерацию миниатюр поста в фоновый пул
+    (или выполняет сразу, если ``POSTS_THUMBNAIL_ASYNC`` выключен)."""
+    if not post.image:
+        return None
+    args = (post.pk, post.image.name, post.group_id, post.author_id)
+    if not settings.POSTS_THUMBNAIL_ASYNC:
+        try:
+            generate_thumbnails(*args)
+        except Exception:
+            logger.exception('Не удалось создать миниатюры поста %s', post.pk)
+        return None
+    with _lock:
+        if post.pk in _pending:
+            return None
+        _pending.add(post.pk)
+    return _get_executor().submit(_generate_in_worker, *args)
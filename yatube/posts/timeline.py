@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import Follow, Post, TimelineEntry
+
+
+def _entries(user_ids, posts):
+    return [
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in user_ids
+        for post_id, pub_date in posts
+    ]
+
+
+def trim(user_ids):
+    """Оставляет в лентах пользователей не больше
+    ``POSTS_TIMELINE_LENGTH`` последних записей — одним DELETE."""
+    length = settings.POSTS_TIMELINE_LENGTH
+    cutoff = TimelineEntry.objects.filter(
+        user_id=OuterRef('user_id')
+    ).order_by('-pub_date').values('pub_date')[length - 1:length]
+    TimelineEntry.objects.filter(
+        user_id__in=user_ids, pub_date__lt=Subquery(cutoff)
+    ).delete()
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    if not followers:
+        return
+    TimelineEntry.objects.bulk_create(
+        _entries(followers, [(post.pk, post.pub_date)]),
+        ignore_conflicts=True,
+    )
+    trim(followers)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора."""
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.POSTS_TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        _entries([user_id], posts), ignore_conflicts=True
+    )
+    trim([user_id])
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """Пересобирает ленты всех подписчиков одним INSERT ... SELECT
+    (после массовой загрузки, минуя сигналы); возвращает число записей."""
+    TimelineEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TimelineEntry._meta.db_table} '
+            '(user_id, post_id, pub_date) '
+            'SELECT user_id, post_id, pub_date FROM ('
+            'SELECT follow.user_id, post.id AS post_id, post.pub_date, '
+            'ROW_NUMBER() OVER (PARTITION BY follow.user_id '
+            'ORDER BY post.pub_date DESC, post.id DESC) AS position '
+            f'FROM {Follow._meta.db_table} follow '
+            f'JOIN {Post._meta.db_table} post '
+            'ON post.author_id = follow.author_id'
+            ') WHERE position <= %s',
+            [settings.POSTS_TIMELINE_LENGTH],
+        )
+        return cursor.rowcount
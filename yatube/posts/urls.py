@@ -8,6 +8,8 @@ urlpatterns = [
     path('new/', views.new_post, name='new_post'),
     path('group/<slug:slug>/', views.group_posts, name='posts'),
     path('follow/', views.follow_index, name='follow_index'),
+    # Во втором сегменте пути: search/ совпало бы со страницей автора search
+    path('posts/search/', views.search, name='search'),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
@@ -16,6 +18,8 @@ urlpatterns = [
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path("<username>/<int:post_id>/comment", views.add_comment,
          name='add_comment'),
+    path('<str:username>/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'),
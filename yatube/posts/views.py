@@ -1,76 +1,124 @@
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import Paginator
+from django.http import (Http404, HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 
-
-from .models import Group, Post, Follow
+from . import follows
+from .models import Comment, Group, Post, UserCounters
+from .caching import (INDEX_FEED, cache_anonymous_page, conditional_page,
+                      group_etag, group_feed_name, index_etag, post_etag,
+                      profile_etag)
+from .counters import get_user_counters
+from .export import COLUMNS, CONTENT_TYPES, FORMATS, export_lines
+from .feeds import (TIMELINE_ORDERING, feed, follow_feed, group_feed,
+                    index_feed, profile_feed, timeline_posts)
 from .forms import PostForm, CommentForm
+from .pagination import COMMENT_ORDERING, CursorPaginator, get_page
+from .search import SearchResults
+from .thumbnails import schedule_thumbnails
 
 User = get_user_model()
 
 
+@conditional_page(index_etag)
+@cache_anonymous_page(lambda: INDEX_FEED)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = index_feed()
+    page = get_page(request, post_list)
     return render(request,
                   'index.html',
                   {'page': page}
                   )
 
 
+@conditional_page(group_etag)
+@cache_anonymous_page(group_feed_name)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = group_feed(group)
+    page = get_page(request, post_list)
     return render(request, 'group.html', {'group': group, 'page': page})
 
 
-def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    posts_count = posts.count()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    following = False
-    follower_count = Follow.objects.filter(
-        author=author.id
-    ).count()
-    following_count = Follow.objects.filter(
-        user=author.id
-    ).count()
-    if request.user.is_authenticated:
-        if Follow.objects.filter(
-            author__following__user=request.user
-        ).exists():
-            following = True
-    return render(request, 'profile.html', {'author': author,
-                                            'page': page,
-                                            'posts_count': posts_count,
-                                            'following': following,
-                                            'follower_count': follower_count,
-                                            'following_count': following_count}
-                  )
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(SearchResults(query), settings.POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'search.html', {'query': query, 'page': page})
 
 
-def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
-    comments = post.comments.all()
+@conditional_page(profile_etag)
+def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    posts_count = posts.count()
+    page = get_page(request, profile_feed(author))
+    counters = get_user_counters(author)
+    context = {
+        'author': author,
+        'page': page,
+        'posts_count': counters.posts_count,
+        'following': follows.is_following(request.user, author),
+        'follower_count': counters.followers_count,
+        'following_count': counters.following_count,
+    }
+    return render(request, 'profile.html', context)
+
+
+@conditional_page(post_etag)
+def post_view(request, username, post_id):
+    post = get_object_or_404(feed(), author__username=username, id=post_id)
+    comments = comment_page(request, post.pk)
+    author = post.author
+    counters = get_user_counters(author)
     form = CommentForm()
-    return render(request, 'post.html', {'author': author,
-                                         'posts_count': posts_count,
-                                         'post': post,
-                                         'comments': comments,
-                                         'form': form}
-                  )
+    context = {
+        'author': author,
+        'posts_count': counters.posts_count,
+        'follower_count': counters.followers_count,
+        'following_count': counters.following_count,
+        'post': post,
+        'comments': comments,
+        'form': form,
+    }
+    return render(request, 'post.html', context)
+
+
+def comment_page(request, post_id):
+    """Страница комментариев по курсору ``?comments=``: от старых к новым,
+    без OFFSET и без запроса автора на каждый комментарий."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author')
+    paginator = CursorPaginator(comments, settings.POSTS_COMMENTS_PER_PAGE,
+                                COMMENT_ORDERING)
+    return paginator.get_page(request.GET.get('comments'))
+
+
+def post_comments(request, username, post_id):
+    """Следующая порция комментариев для кнопки «Показать ещё»."""
+    if not Post.objects.filter(author__username=username,
+                               id=post_id).exists():
+        raise Http404
+    page = comment_page(request, post_id)
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'author_url': reverse('profile',
+                                      args=[comment.author.username]),
+                'text': comment.text,
+                'created': comment.created.isoformat(),
+            }
+            for comment in page
+        ],
+        'next_cursor': page.next_cursor,
+    })
 
 
 @login_required
@@ -84,6 +132,8 @@ def post_edit(request, username, post_id):
         return redirect('post', username, edit_post.pk)
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(edit_post)
         return redirect('post', username, edit_post.pk)
     context = {'form': form, 'is_edit': True,
                'post_id': post_id, 'edit_post': edit_post
@@ -123,6 +173,7 @@ def new_post(request):
         new_post = form.save(commit=False)
         new_post.author = request.user
         new_post.save()
+        schedule_thumbnails(new_post)
         return redirect('index')
     return render(request, 'new_post.html', {'form': form,
                                              'is_edit': False})
@@ -130,28 +181,66 @@ def new_post(request):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = get_page(request, follow_feed(request.user),
+                    ordering=TIMELINE_ORDERING)
+    page.object_list = timeline_posts(page.object_list)
     return render(request, 'follow.html', {'page': page})
 
 
-@login_required
+def login_required_ajax(view):
+    """Как ``login_required``, но AJAX-запросу гостя отвечает 401
+    в JSON, а не редиректом на страницу входа."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.is_ajax() and not request.user.is_authenticated:
+            return JsonResponse({'error': 'нужно войти'}, status=401)
+        return login_required(view)(request, *args, **kwargs)
+    return wrapper
+
+
+def follow_response(request, author, following):
+    if not request.is_ajax():
+        return redirect('profile', username=author.username)
+    counters = UserCounters.objects.filter(user=author).first()
+    return JsonResponse({
+        'following': following,
+        'follower_count': counters.followers_count if counters else 0,
+    })
+
+
+@login_required_ajax
 def profile_follow(request, username):
-    user = request.user
     author = get_object_or_404(User, username=username)
-    if user != author:
-        if not Follow.objects.filter(user=user, author=author).exists():
-            follow = Follow(user=user, author=author)
-            follow.save()
-    return redirect('profile', username=username)
+    follows.follow(request.user.pk, author.pk)
+    return follow_response(request, author, request.user != author)
 
 
-@login_required
+@login_required_ajax
 def profile_unfollow(request, username):
-    user = request.user
     author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=user, author=author)
-    follow.delete()
-    return redirect('profile', username=username)
+    follows.unfollow(request.user.pk, author.pk)
+    return follow_response(request, author, False)
+
+
+@staff_member_required
+def export_content(request, kind):
+    if kind not in COLUMNS:
+        raise Http404
+    data_format = request.GET.get('format', 'jsonl')
+    if data_format not in FORMATS:
+        return HttpResponseBadRequest('Формат: jsonl или csv.')
+    try:
+        lines = export_lines(
+            kind, data_format,
+            **{name: request.GET.get(name)
+               for name in ('author', 'group', 'since', 'until')}
+        )
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    response = StreamingHttpResponse(
+        lines, content_type=f'{CONTENT_TYPES[data_format]}; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{data_format}"'
+    )
+    return response
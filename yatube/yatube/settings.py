@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from core.cache import is_shared, parse_cache_url
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = '=)6-l$3!4d6y_sn0eob(-ugl=he#!0@an)s87^4)u*)9u+xu*h'
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
     'posts',
     'about',
     'users',
+    'core',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -45,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,12 +68,24 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
+# Вне DEBUG шаблоны компилируются один раз на процесс (cached.Loader);
+# yatube/wsgi.py компилирует их все при старте воркера, если не выключено
+# CORE_WARM_TEMPLATES=0 (проверка без запуска — manage.py warm_templates)
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader',
+                         TEMPLATE_LOADERS)]
+CORE_WARM_TEMPLATES = os.environ.get('CORE_WARM_TEMPLATES', '1') == '1'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -82,13 +99,49 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+# Соединение живёт DATABASE_CONN_MAX_AGE секунд и переиспользуется
+# запросами потока. DATABASE_POOL_SIZE > 0 включает пул соединений
+# на процесс (core.backends.sqlite3): поток ждёт свободное соединение
+# до CORE_DB_POOL_TIMEOUT секунд; состояние пула — /stats/db/
+CORE_DB_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 0))
+CORE_DB_POOL_TIMEOUT = float(os.environ.get('DATABASE_POOL_TIMEOUT', 10))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': ('core.backends.sqlite3' if CORE_DB_POOL_SIZE
+                   else 'django.db.backends.sqlite3'),
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
     }
 }
 
+# Настройки каждого соединения с SQLite (core.db): WAL не блокирует
+# читателей на время записи, synchronous=NORMAL в WAL безопасен для
+# целостности; ждать освободившейся блокировки до busy_timeout мс
+CORE_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 2 ** 20)),
+    'temp_store': 'memory',
+}
+
+# Реплики только для чтения: DATABASE_REPLICAS — имена баз (для SQLite —
+# пути к копиям файла) через запятую. Чтения в запросах идут на реплики,
+# после записи браузер CORE_DB_PIN_SECONDS секунд читает с основной базы
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+CORE_DB_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    CORE_DB_REPLICAS.append(f'replica{number}')
+CORE_DB_PIN_SECONDS = int(os.environ.get('CORE_DB_PIN_SECONDS', 5))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -133,8 +186,65 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Кэш выбирается переменной окружения CACHE_URL, например
+# file:///var/tmp/yatube_cache или memcached://127.0.0.1:11211 —
+# такой кэш общий для всех воркеров, в отличие от locmem
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': parse_cache_url(os.environ.get('CACHE_URL', 'locmem://')),
 }
+# Данные, которые сбрасываются при записи, а не по таймауту, кэшируются
+# только в общем кэше. Один процесс (runserver, единственный воркер) может
+# объявить общим и locmem: CORE_CACHE_SHARED=1
+CORE_CACHE_SHARED = os.environ.get(
+    'CORE_CACHE_SHARED', '1' if is_shared(CACHES['default']) else '0'
+) == '1'
+
+# Паджинация лент: 'offset' — номера страниц (?page=),
+# 'cursor' — keyset-паджинация по (pub_date, id) через ?cursor=
+POSTS_PER_PAGE = 10
+POSTS_PAGINATION = os.environ.get('POSTS_PAGINATION', 'offset')
+
+# Сколько последних постов хранится в материализованной ленте подписок
+POSTS_TIMELINE_LENGTH = int(os.environ.get('POSTS_TIMELINE_LENGTH', 1000))
+
+# Время жизни страниц лент, закэшированных для анонимных посетителей;
+# актуальность обеспечивают версии лент, а не TTL
+POSTS_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни версий лент. Версию создаёт и запрос к несуществующей группе
+# или автору, поэтому вечной она быть не может; после истечения лента просто
+# получает новую версию и один раз перерисовывается
+POSTS_FEED_VERSION_TIMEOUT = 60 * 60 * 24
+
+# Миниатюры картинок постов: генерируются после загрузки в фоновом пуле
+# потоков, до готовности шаблон рисует заглушку. С POSTS_THUMBNAIL_ASYNC=0
+# генерируются прямо в запросе
+THUMBNAIL_BACKEND = 'posts.thumbnails.PostThumbnailBackend'
+POSTS_THUMBNAIL_ASYNC = os.environ.get('POSTS_THUMBNAIL_ASYNC', '1') == '1'
+POSTS_THUMBNAIL_WORKERS = int(os.environ.get('POSTS_THUMBNAIL_WORKERS', 2))
+
+# Загрузка картинок: файлы пишутся во временный файл на диске, а не в память;
+# в хранилище попадает перекодированная копия без метаданных
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POSTS_IMAGE_MAX_UPLOAD_SIZE = 20 * 2 ** 20
+POSTS_IMAGE_MAX_PIXELS = 50_000_000
+POSTS_IMAGE_MAX_SIDE = 2048
+POSTS_IMAGE_QUALITY = 85
+
+# Заголовок Server-Timing с временем SQL, шаблонов и вью: персоналу всегда,
+# остальным — только с CORE_SERVER_TIMING=1 (он раскрывает устройство
+# запросов); гистограммы по URL для персонала — /stats/requests/
+CORE_SERVER_TIMING = os.environ.get('CORE_SERVER_TIMING', '0') == '1'
+
+# Множества подписчиков и подписок в кэше (только с CORE_CACHE_SHARED);
+# сбрасываются при подписке и отписке, таймаут — страховка
+POSTS_FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+
+# Комментарии на странице поста; остальные подгружаются по курсору
+POSTS_COMMENTS_PER_PAGE = 20
+
+# JSON API (/api/): размер страницы по умолчанию — POSTS_PER_PAGE,
+# клиент может попросить ?limit= не больше этого
+POSTS_API_MAX_LIMIT = 100
@@ -19,6 +19,8 @@ from django.conf.urls import handler404, handler500
 from django.contrib import admin
 from django.urls import include, path
 
+from posts import views as posts_views
+
 handler404 = 'posts.views.page_not_found'  # noqa
 handler500 = 'posts.views.server_error'  # noqa
 
@@ -26,6 +28,13 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('stats/', include('core.urls', namespace='core')),
+    # Под служебным префиксом, чтобы не перекрывать страницы автора
+    # с именем export
+    path('stats/export/<str:kind>/', posts_views.export_content,
+         name='export_content'),
+    # Версия в пути: api/<что угодно>/ совпало бы со страницами автора api
+    path('api/v1/', include('posts.api_urls', namespace='api')),
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
 